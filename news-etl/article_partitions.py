@@ -0,0 +1,325 @@
+"""
+Monthly partitioning of the articles table.
+
+``articles`` is range-partitioned on ``published_ts`` into one partition per
+UTC calendar month (``articles_pYYYYMM``), so date-bounded queries only scan
+the months they cover, the watermark lookup reads the newest partition's
+index, and vacuum works on one month at a time.
+
+The partition key has to be part of the primary key, which becomes
+``(id, published_ts)``, and cannot be NULL. Articles whose publication date
+cannot be parsed are stored with ``published_ts = '-infinity'`` in the
+``articles_undated`` partition.
+
+Partitions are created for the current and next month on every run and for
+any other month as soon as a batch about to be loaded needs it. Old months
+can be detached without blocking the rest of the table (see
+``detach_article_partitions``); a detached partition is an ordinary table
+that can be archived with ``pg_dump -t`` and dropped.
+
+Detached months are recorded in ``archived_article_months`` and closed to
+loads: staged rows for them are discarded before the merge, so a re-fetch
+or replay of an archived month neither fails nor counts it twice in the
+rollup.
+"""
+
+from datetime import date
+
+from pipeline_logger import add_months, month_start
+
+
+# Stored as published_ts when published_at cannot be parsed
+UNDATED = "-infinity"
+
+_PARTITION_PREFIX = "articles_p"
+_UNDATED_PARTITION = "articles_undated"
+
+# Partitions known to exist, so loads only issue DDL for new months
+_known_partitions: set[str] = set()
+
+
+def _utc_bound(month: date) -> str:
+    # Spell out the offset so bounds do not depend on the session time zone
+    return f"{month.isoformat()} 00:00:00+00"
+
+
+def create_article_partition(cursor, month: date, parent: str = "articles") -> str:
+    """
+    Create the partition of `parent` holding `month`, if it is missing.
+
+    Raises RuntimeError if a table that is not a partition already has the
+    name, e.g. the detached partition of an archived month, since CREATE
+    TABLE IF NOT EXISTS would silently leave the month without a partition.
+
+    Returns the partition name.
+    """
+    month = month_start(month)
+    name = f"{_PARTITION_PREFIX}{month:%Y%m}"
+    if name not in _known_partitions:
+        cursor.execute("SELECT relispartition FROM pg_class WHERE oid = to_regclass(%s)", (name,))
+        row = cursor.fetchone()
+        if row is not None and not row[0]:
+            raise RuntimeError(f"{name} exists but is not a partition of {parent}; "
+                               f"attach it again or rename it before loading {month:%Y-%m}")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {name}
+            PARTITION OF {parent}
+            FOR VALUES FROM ('{_utc_bound(month)}') TO ('{_utc_bound(add_months(month, 1))}')
+        """)
+        _known_partitions.add(name)
+    return name
+
+
+def create_undated_partition(cursor, parent: str = "articles") -> None:
+    # Everything before year 1, i.e. only '-infinity'
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_UNDATED_PARTITION}
+        PARTITION OF {parent}
+        FOR VALUES FROM (MINVALUE) TO ('0001-01-01 00:00:00+00')
+    """)
+
+
+def create_upcoming_partitions(cursor, today: date | None = None, parent: str = "articles") -> None:
+    """
+    Create the undated partition and those for this month and next month.
+    """
+    this_month = month_start(today or date.today())
+    create_undated_partition(cursor, parent)
+    for month in (this_month, add_months(this_month, 1)):
+        create_article_partition(cursor, month, parent)
+
+
+def initialize_archived_months(cursor) -> None:
+    """
+    Create the table recording months whose partition was detached.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS archived_article_months (
+            month DATE PRIMARY KEY,
+            partition_name TEXT NOT NULL,
+            dropped BOOLEAN NOT NULL DEFAULT FALSE,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def kept_archived_partitions(cursor) -> list[str]:
+    """
+    Return the detached partitions that still exist as tables, oldest first.
+
+    article_daily_stats still counts their rows until they are dropped.
+    """
+    cursor.execute("""
+        SELECT partition_name FROM archived_article_months
+        WHERE NOT dropped AND to_regclass(partition_name) IS NOT NULL
+        ORDER BY month
+    """)
+    return [name for name, in cursor.fetchall()]
+
+
+def discard_archived_rows(cursor) -> int:
+    """
+    Delete rows for archived months from articles_staging.
+
+    Runs before each merge. Returns the number of rows discarded.
+    """
+    cursor.execute("""
+        DELETE FROM articles_staging
+        WHERE date_trunc('month', published_timestamp(published_at) AT TIME ZONE 'UTC')::DATE
+              IN (SELECT month FROM archived_article_months)
+    """)
+    return cursor.rowcount
+
+
+def ensure_staged_partitions(cursor) -> None:
+    """
+    Create the partitions needed by the rows in articles_staging.
+
+    Runs before each merge, so a batch reaching back to a month that has no
+    partition yet never fails on insert.
+    """
+    cursor.execute("""
+        SELECT DISTINCT date_trunc('month', published_timestamp(published_at) AT TIME ZONE 'UTC')::DATE
+        FROM articles_staging
+        WHERE published_timestamp(published_at) IS NOT NULL
+    """)
+    for month, in cursor.fetchall():
+        create_article_partition(cursor, month)
+
+
+def _relkind(cursor, table: str) -> str | None:
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass(%s)", (table,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
+
+def migrate_articles_to_partitions(cursor, batch_size: int) -> int:
+    """
+    One-time move of an unpartitioned articles table into monthly partitions.
+
+    The partitioned copy is built alongside as ``articles_partitioned``,
+    batch_size rows per transaction in id order, so the dashboard keeps
+    reading the old table and an interrupted migration resumes where it
+    stopped. Once every row is copied and indexed, the old table is dropped
+    and the copy renamed to ``articles`` in one short transaction.
+
+    Returns the number of rows copied by this call.
+    """
+    if _relkind(cursor, "articles") != "r":
+        return 0
+    conn = cursor.connection
+
+    # LIKE keeps any extra columns an older schema may have added
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS articles_partitioned
+        (LIKE articles INCLUDING DEFAULTS INCLUDING GENERATED)
+        PARTITION BY RANGE (published_ts)
+    """)
+    cursor.execute("ALTER TABLE articles_partitioned ALTER COLUMN published_ts SET NOT NULL")
+    cursor.execute("""
+        SELECT 1 FROM pg_constraint
+        WHERE conrelid = 'articles_partitioned'::regclass AND contype = 'p'
+    """)
+    if cursor.fetchone() is None:
+        cursor.execute("ALTER TABLE articles_partitioned ADD PRIMARY KEY (id, published_ts)")
+
+    create_upcoming_partitions(cursor, parent="articles_partitioned")
+    cursor.execute("""
+        SELECT DISTINCT date_trunc('month', COALESCE(published_ts, published_timestamp(published_at))
+                                   AT TIME ZONE 'UTC')::DATE
+        FROM articles
+        WHERE COALESCE(published_ts, published_timestamp(published_at)) IS NOT NULL
+    """)
+    for month, in cursor.fetchall():
+        create_article_partition(cursor, month, parent="articles_partitioned")
+    conn.commit()
+
+    # Generated columns (search_vector) are recomputed by the insert
+    cursor.execute("""
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = 'articles'
+          AND is_generated = 'NEVER' AND column_name <> 'published_ts'
+        ORDER BY ordinal_position
+    """)
+    columns = ", ".join(name for name, in cursor.fetchall())
+
+    cursor.execute("SELECT COALESCE(MAX(id), '') FROM articles_partitioned")
+    last_id, = cursor.fetchone()
+    copied = 0
+    while True:
+        cursor.execute(f"""
+            WITH batch AS (
+                SELECT {columns}, published_ts
+                FROM articles
+                WHERE id > %s
+                ORDER BY id
+                LIMIT %s
+            ),
+            copied AS (
+                INSERT INTO articles_partitioned ({columns}, published_ts)
+                SELECT {columns},
+                       COALESCE(published_ts, published_timestamp(published_at), %s::TIMESTAMPTZ)
+                FROM batch
+                RETURNING 1
+            )
+            SELECT (SELECT MAX(id) FROM batch), (SELECT COUNT(*) FROM copied)
+        """, (last_id, batch_size, UNDATED))
+        batch_last_id, count = cursor.fetchone()
+        conn.commit()
+        if batch_last_id is None:
+            break
+        last_id = batch_last_id
+        copied += count
+
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_articles_partitioned_published_ts
+        ON articles_partitioned (published_ts)
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_articles_partitioned_search_vector
+        ON articles_partitioned USING GIN (search_vector)
+    """)
+    conn.commit()
+
+    cursor.execute("DROP TABLE articles")
+    cursor.execute("ALTER TABLE articles_partitioned RENAME TO articles")
+    cursor.execute("ALTER TABLE articles RENAME CONSTRAINT articles_partitioned_pkey TO articles_pkey")
+    cursor.execute("ALTER INDEX idx_articles_partitioned_published_ts RENAME TO idx_articles_published_ts")
+    cursor.execute("ALTER INDEX idx_articles_partitioned_search_vector RENAME TO idx_articles_search_vector")
+    conn.commit()
+    return copied
+
+
+def detach_article_partitions(conn, before: date, drop: bool = False) -> list[str]:
+    """
+    Detach every monthly partition for a month before `before`.
+
+    Uses DETACH PARTITION ... CONCURRENTLY, which only takes a SHARE UPDATE
+    EXCLUSIVE lock on articles, so loads and queries on other months carry
+    on. It cannot run inside a transaction, so `conn` is switched to
+    autocommit. A detach interrupted earlier is finalized first.
+
+    Every detached month is recorded in archived_article_months, so later
+    loads skip it. Detached partitions remain as standalone tables for
+    archiving, and article_daily_stats keeps their rollup cells, so the
+    dashboard's history is unchanged. With `drop`, the partition's rows are
+    subtracted from the rollup and the table is dropped in one transaction.
+    Returns the detached partition names.
+    """
+    # load imports this module
+    from load import subtract_from_daily_stats
+
+    cutoff = month_start(before)
+    conn.autocommit = True
+    with conn.cursor() as cursor:
+        initialize_archived_months(cursor)
+        cursor.execute("""
+            SELECT child.relname, pg_inherits.inhdetachpending
+            FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            WHERE pg_inherits.inhparent = 'articles'::regclass
+        """)
+        detached = []
+        for name, pending in sorted(cursor.fetchall()):
+            suffix = name[len(_PARTITION_PREFIX):]
+            if not name.startswith(_PARTITION_PREFIX) or not suffix.isdigit() or len(suffix) != 6:
+                continue
+            month = date(int(suffix[:4]), int(suffix[4:]), 1)
+            if month >= cutoff:
+                continue
+            if pending:
+                cursor.execute(f"ALTER TABLE articles DETACH PARTITION {name} FINALIZE")
+            else:
+                cursor.execute(f"ALTER TABLE articles DETACH PARTITION {name} CONCURRENTLY")
+
+            conn.autocommit = False
+            cursor.execute("""
+                INSERT INTO archived_article_months (month, partition_name, dropped)
+                VALUES (%s, %s, %s)
+                ON CONFLICT (month) DO UPDATE SET dropped = EXCLUDED.dropped
+            """, (month, name, drop))
+            if drop:
+                subtract_from_daily_stats(cursor, name)
+                cursor.execute(f"DROP TABLE {name}")
+            conn.commit()
+            conn.autocommit = True
+            _known_partitions.discard(name)
+            detached.append(name)
+
+        if drop:
+            # Months detached by an earlier run without --drop
+            cursor.execute("""
+                SELECT month, partition_name FROM archived_article_months
+                WHERE NOT dropped AND month < %s AND to_regclass(partition_name) IS NOT NULL
+                ORDER BY month
+            """, (cutoff,))
+            for month, name in cursor.fetchall():
+                conn.autocommit = False
+                subtract_from_daily_stats(cursor, name)
+                cursor.execute(f"DROP TABLE {name}")
+                cursor.execute("UPDATE archived_article_months SET dropped = TRUE WHERE month = %s",
+                               (month,))
+                conn.commit()
+                conn.autocommit = True
+                detached.append(name)
+    return detached
@@ -0,0 +1,303 @@
+"""
+Benchmark suite for the news ETL pipeline.
+
+Runs against a local PostgreSQL (POSTGRES_URL) inside a scratch schema,
+``etl_bench``, which is dropped and recreated for every measurement, so the
+real tables are never touched. Articles come from the synthetic generator
+in fake_newsdata.py, with configurable size distributions, duplicate,
+syndicated (near-duplicate) and invalid rates.
+
+Two suites are available:
+- ``components``: times ``_transform_articles``, ``validate_batch``,
+  near-duplicate clustering and ``load_articles`` on each micro-batch of
+  BATCH_SIZE articles
+- ``pipeline``: times the full ``fetch_and_store_articles`` path with
+  NEWS_SOURCE=fake serving the articles
+
+Each suite and scale point runs in a fresh process so peak memory is
+measured per run. Per stage the report holds rows/sec, p50/p95 span
+latency and peak RSS. Results are written as JSON tagged with the current
+commit, and two result files can be compared:
+
+    python benchmark.py run --scales 1k 10k
+    python benchmark.py compare benchmark_results/old.json benchmark_results/new.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import resource
+import subprocess
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+
+
+SCALES: dict[str, int] = {
+    "1k": 1_000,
+    "10k": 10_000,
+    "100k": 100_000,
+    "1m": 1_000_000,
+}
+
+SUITES = ("components", "pipeline")
+
+BENCH_SCHEMA = "etl_bench"
+
+RESULTS_DIR = "benchmark_results"
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _configure_environment(options: dict, articles: int) -> None:
+    """
+    Point this process at the scratch schema and the synthetic source.
+
+    Must run before the pipeline modules are imported, since they read
+    their settings at import time.
+    """
+    os.environ.update({
+        "PGOPTIONS": f"-c search_path={BENCH_SCHEMA}",
+        "ETL_BATCH_SIZE": str(options["batch_size"]),
+        "NEWS_SOURCE": "fake",
+        "NEWS_QUERY_SPECS": json.dumps([{"language": "en"}]),
+        "NEWS_API_MAX_PAGES": str(math.ceil(articles / options["page_size"])),
+        "FAKE_NEWS_TOTAL": str(articles),
+        "FAKE_NEWS_PAGE_SIZE": str(options["page_size"]),
+        "FAKE_NEWS_SEED": str(options["seed"]),
+        "FAKE_NEWS_DUPLICATE_RATE": str(options["duplicate_rate"]),
+        "FAKE_NEWS_SYNDICATED_RATE": str(options["syndicated_rate"]),
+        "FAKE_NEWS_MALFORMED_RATE": str(options["invalid_rate"]),
+        "FAKE_NEWS_TITLE_WORDS": str(options["title_words"]),
+        "FAKE_NEWS_BODY_WORDS": str(options["body_words"]),
+        "FAKE_NEWS_BODY_SIGMA": str(options["body_sigma"]),
+    })
+
+
+def _reset_schema(conn) -> None:
+    with conn.cursor() as cursor:
+        cursor.execute(f"DROP SCHEMA IF EXISTS {BENCH_SCHEMA} CASCADE")
+        cursor.execute(f"CREATE SCHEMA {BENCH_SCHEMA}")
+    conn.commit()
+
+
+def _report(metrics, wall_seconds: float, articles: int) -> dict:
+    """
+    Summarise a RunMetrics with per-stage latency percentiles.
+    """
+    stages = metrics.as_dict()
+    for stage, values in stages.items():
+        for label, q in (("p50_ms", 50), ("p95_ms", 95)):
+            seconds = metrics.percentile(stage, q)
+            values[label] = round(seconds * 1000, 3) if seconds is not None else None
+
+    return {
+        "articles": articles,
+        "wall_seconds": round(wall_seconds, 3),
+        "rows_per_sec": round(articles / wall_seconds, 1) if wall_seconds else None,
+        "peak_rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "children_peak_rss_kb": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss,
+        "stages": stages,
+    }
+
+
+def _run_components(articles: int, options: dict) -> dict:
+    _configure_environment(options, articles)
+
+    import psycopg2
+    import etl
+    from fake_newsdata import make_fake_client
+    from load import load_articles
+    from metrics import RunMetrics
+    from near_duplicates import NEAR_DUP_ENABLED, NearDuplicateIndex
+    from sentiment import shutdown_pool
+    from validators import validate_batch
+
+    metrics = RunMetrics(record_samples=True)
+    client = make_fake_client()
+    started = time.perf_counter()
+
+    try:
+        with psycopg2.connect(os.environ["POSTGRES_URL"]) as conn:
+            _reset_schema(conn)
+            with conn.cursor() as cursor, contextlib.redirect_stdout(io.StringIO()):
+                etl._initialize_schema(cursor)
+                conn.commit()
+                index = NearDuplicateIndex(cursor) if NEAR_DUP_ENABLED else None
+
+                started = time.perf_counter()
+                for start in range(0, articles, etl.BATCH_SIZE):
+                    raw = [client.article("bench", index)
+                           for index in range(start, min(start + etl.BATCH_SIZE, articles))]
+
+                    with metrics.span("transform", rows_in=len(raw)) as span:
+                        transformed = etl._transform_articles(raw, metrics=metrics)
+                        span.rows_out = len(transformed)
+
+                    with metrics.span("validate", rows_in=len(transformed)) as span:
+                        valid, _ = validate_batch(transformed)
+                        span.rows_out = len(valid)
+
+                    if index is not None:
+                        with metrics.span("cluster", rows_in=len(valid)) as span:
+                            index.assign_clusters(valid)
+                            span.rows_out = len(valid)
+
+                    with metrics.span("load", rows_in=len(valid)) as span:
+                        load_articles(cursor, valid, metrics)
+                        conn.commit()
+                        span.rows_out = len(valid)
+    finally:
+        shutdown_pool()
+
+    return _report(metrics, time.perf_counter() - started, articles)
+
+
+def _run_pipeline(articles: int, options: dict) -> dict:
+    _configure_environment(options, articles)
+
+    import psycopg2
+    import etl
+    from metrics import RunMetrics
+
+    with psycopg2.connect(os.environ["POSTGRES_URL"]) as conn:
+        _reset_schema(conn)
+
+    metrics = RunMetrics(record_samples=True)
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()) as output:
+        etl.fetch_and_store_articles(metrics)
+    wall_seconds = time.perf_counter() - started
+
+    with psycopg2.connect(os.environ["POSTGRES_URL"]) as conn, conn.cursor() as cursor:
+        cursor.execute("SELECT COUNT(*) FROM articles")
+        stored, = cursor.fetchone()
+
+    report = _report(metrics, wall_seconds, articles)
+    report["articles_stored"] = stored
+    if "Pipeline run summary" not in output.getvalue():
+        report["error"] = output.getvalue().strip().splitlines()[-1:]
+    return report
+
+
+_SUITE_RUNNERS = {
+    "components": _run_components,
+    "pipeline": _run_pipeline,
+}
+
+
+def run_benchmarks(scales: list[str], suites: list[str], options: dict) -> dict:
+    """
+    Run every suite at every scale point, each in a fresh process.
+    """
+    results: dict[str, dict] = {}
+    for scale in scales:
+        articles = SCALES[scale]
+        results[scale] = {}
+        for suite in suites:
+            print(f"Running {suite} at {scale} ({articles:,} articles)...")
+            with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+                report = pool.submit(_SUITE_RUNNERS[suite], articles, options).result()
+            results[scale][suite] = report
+            print(f"  {report['wall_seconds']}s, {report['rows_per_sec']} rows/sec, "
+                  f"peak RSS {report['peak_rss_kb']} KB")
+
+    return {
+        "created_at": datetime.now().isoformat(),
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "options": options,
+        "results": results,
+    }
+
+
+def compare_results(old: dict, new: dict) -> None:
+    """
+    Print rows/sec and p95 latency of every stage measured in both results.
+    """
+    print(f"{'scale':<6} {'suite':<11} {'stage':<20} {'old rows/s':>12} {'new rows/s':>12} "
+          f"{'change':>8} {'old p95 ms':>11} {'new p95 ms':>11}")
+    for scale, suites in new["results"].items():
+        for suite, report in suites.items():
+            previous = old["results"].get(scale, {}).get(suite)
+            if previous is None:
+                continue
+            for stage, values in report["stages"].items():
+                before = previous["stages"].get(stage)
+                if before is None:
+                    continue
+                old_rate, new_rate = before["rows_per_sec"], values["rows_per_sec"]
+                change = (f"{(new_rate - old_rate) / old_rate:+.1%}"
+                          if old_rate and new_rate is not None else "n/a")
+                print(f"{scale:<6} {suite:<11} {stage:<20} {old_rate or 0:>12,.1f} "
+                      f"{new_rate or 0:>12,.1f} {change:>8} {before['p95_ms'] or 0:>11,.2f} "
+                      f"{values['p95_ms'] or 0:>11,.2f}")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="News ETL benchmark suite")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="Run benchmarks and write a JSON result file")
+    run.add_argument("--scales", nargs="+", choices=list(SCALES), default=["1k", "10k"])
+    run.add_argument("--suites", nargs="+", choices=SUITES, default=list(SUITES))
+    run.add_argument("--batch-size", type=int, default=int(os.environ.get("ETL_BATCH_SIZE", "500")))
+    run.add_argument("--page-size", type=int, default=1000, help="Articles per fake API page")
+    run.add_argument("--seed", type=int, default=0)
+    run.add_argument("--duplicate-rate", type=float, default=0.05)
+    run.add_argument("--syndicated-rate", type=float, default=0.05,
+                     help="Share of near-duplicate copies of wire stories")
+    run.add_argument("--invalid-rate", type=float, default=0.02)
+    run.add_argument("--title-words", type=int, default=10, help="Median title length in words")
+    run.add_argument("--body-words", type=int, default=400, help="Median body length in words")
+    run.add_argument("--body-sigma", type=float, default=0.7, help="Spread of the body length")
+    run.add_argument("--out", help="Result file (default: benchmark_results/<time>-<commit>.json)")
+
+    compare = commands.add_parser("compare", help="Compare two result files")
+    compare.add_argument("old")
+    compare.add_argument("new")
+
+    return parser.parse_args(argv)
+
+
+if __name__ == "__main__":
+    args = _parse_args()
+
+    if args.command == "compare":
+        with open(args.old) as old_file, open(args.new) as new_file:
+            compare_results(json.load(old_file), json.load(new_file))
+    else:
+        if not os.environ.get("POSTGRES_URL"):
+            print("Error: POSTGRES_URL not set")
+            exit(1)
+
+        options = {
+            "batch_size": args.batch_size,
+            "page_size": args.page_size,
+            "seed": args.seed,
+            "duplicate_rate": args.duplicate_rate,
+            "syndicated_rate": args.syndicated_rate,
+            "invalid_rate": args.invalid_rate,
+            "title_words": args.title_words,
+            "body_words": args.body_words,
+            "body_sigma": args.body_sigma,
+        }
+        results = run_benchmarks(args.scales, args.suites, options)
+
+        out = args.out or os.path.join(
+            RESULTS_DIR, f"{datetime.now():%Y%m%dT%H%M%S}-{results['commit'] or 'nocommit'}.json")
+        os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+        with open(out, "w") as result_file:
+            json.dump(results, result_file, indent=2)
+        print(f"Results written to {out}")
@@ -1,11 +1,14 @@
 import os
-from datetime import datetime, timedelta
+import threading
+from contextlib import contextmanager
+from datetime import datetime, time, timedelta, timezone
 
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 import psycopg2
 import streamlit as st
+from psycopg2.pool import ThreadedConnectionPool
 
 
 # Page configuration
@@ -17,59 +20,369 @@ st.set_page_config(
 )
 
 
-def get_connection():
-    """Create database connection using environment variable."""
+# Database connections per dashboard process, shared by every session. The
+# pool keeps DB_POOL_MIN connections open between queries; connections above
+# that are opened for bursts and closed when returned.
+DB_POOL_MIN = int(os.environ.get("DASHBOARD_DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.environ.get("DASHBOARD_DB_POOL_MAX", "8"))
+
+
+class ConnectionPool:
+    """
+    ThreadedConnectionPool that waits for a free connection and pre-pings it.
+
+    psycopg2's pool raises as soon as every connection is checked out, so a
+    semaphore makes extra sessions wait instead. Each connection is checked
+    with a cheap query before use; dead ones (e.g. after a database restart)
+    are closed and replaced with new connections.
+    """
+
+    def __init__(self, dsn: str, minconn: int, maxconn: int):
+        self._pool = ThreadedConnectionPool(minconn, maxconn, dsn)
+        self._slots = threading.BoundedSemaphore(maxconn)
+        self.maxconn = maxconn
+
+    def _checkout(self):
+        # Every pooled connection may be stale, plus one fresh attempt
+        for _ in range(self.maxconn + 1):
+            conn = self._pool.getconn()
+            try:
+                if not conn.autocommit:
+                    # The dashboard only reads, so never leave a transaction open
+                    conn.set_session(readonly=True, autocommit=True)
+                with conn.cursor() as cursor:
+                    cursor.execute("SELECT 1")
+                return conn
+            except psycopg2.Error:
+                self._pool.putconn(conn, close=True)
+        raise psycopg2.OperationalError("Could not get a working database connection")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection, returning it to the pool afterwards."""
+
+        with self._slots:
+            conn = self._checkout()
+            broken = False
+            try:
+                yield conn
+            except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                broken = True
+                raise
+            finally:
+                self._pool.putconn(conn, close=broken or bool(conn.closed))
+
+
+@st.cache_resource
+def get_pool() -> ConnectionPool:
+    """Create the connection pool shared across Streamlit sessions."""
 
     postgres_url = os.environ.get("POSTGRES_URL")
     if not postgres_url:
         st.error("POSTGRES_URL environment variable not set")
         st.stop()
-    return psycopg2.connect(postgres_url)
+    return ConnectionPool(postgres_url, DB_POOL_MIN, DB_POOL_MAX)
+
+
+def get_connection():
+    """Borrow a pooled database connection for a ``with`` block."""
+
+    return get_pool().connection()
+
+
+# Number of equal-width sentiment histogram buckets over [-1, 1], as kept by the ETL rollup
+SENTIMENT_BUCKETS = 30
+
+# Rollup cells for articles without a source use an empty string
+NO_SOURCE = ''
+
+# Search results shown per page
+SEARCH_PAGE_SIZE = 20
+
+# Matches ranked per search. Ranking reads every candidate's tsvector, so
+# very common terms are ranked within their newest matches rather than
+# across the whole table, and the page says so; rare terms are unaffected.
+SEARCH_MAX_CANDIDATES = int(os.environ.get("DASHBOARD_SEARCH_CANDIDATES", "2000"))
+
+
+def _utc_midnight(day):
+    """Start of a calendar day in UTC, for comparisons against published_ts."""
+
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+def build_filters(start_date=None, end_date=None, source=None, date_column="day") -> tuple[str, list]:
+    """
+    Translate sidebar filters into a SQL WHERE clause and its parameters.
+
+    Bounds are half-open day ranges so they can be served by the index on
+    either the rollup's day column or articles.published_ts.
+    """
+    clauses = []
+    params = []
+    bound = _utc_midnight if date_column == "published_ts" else (lambda day: day)
+
+    if start_date is not None:
+        clauses.append(f"{date_column} >= %s")
+        params.append(bound(start_date))
+    if end_date is not None:
+        clauses.append(f"{date_column} < %s")
+        params.append(bound(end_date + timedelta(days=1)))
+    if source is not None:
+        clauses.append("source = %s")
+        params.append(source)
+
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+    return where, params
+
+
+def run_query(query: str, params: list | None = None) -> pd.DataFrame:
+    """
+    Run a query and return the result as a DataFrame.
+
+    A query that fails because its connection dropped is retried once on a
+    new connection.
+    """
+    for attempt in range(2):
+        try:
+            with get_connection() as conn:
+                return pd.read_sql(query, conn, params=params)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            if attempt:
+                raise
+
 
+# Charts and KPIs read article_daily_stats, the day x source rollup the ETL
+# keeps up to date, so their cost depends on the number of days and sources
+# rather than the number of articles.
 
 @st.cache_data(ttl=300)  # Cache for 5 minutes
-def load_articles():
-    """Load articles from database with caching."""
-    
-    query = """
+def load_filter_options():
+    """Load the article count, date bounds and source list for the sidebar."""
+
+    bounds = run_query("""
+        SELECT
+            COALESCE(SUM(article_count), 0) AS total_articles,
+            MIN(day) AS min_date,
+            MAX(day) AS max_date
+        FROM article_daily_stats
+        WHERE article_count > 0
+    """)
+    sources = run_query("""
+        SELECT DISTINCT source
+        FROM article_daily_stats
+        WHERE source <> %s AND article_count > 0
+        ORDER BY source
+    """, [NO_SOURCE])
+
+    row = bounds.iloc[0]
+    min_date = pd.to_datetime(row['min_date']).date() if row['min_date'] else None
+    max_date = pd.to_datetime(row['max_date']).date() if row['max_date'] else None
+    return int(row['total_articles']), min_date, max_date, sources['source'].tolist()
+
+
+@st.cache_data(ttl=300)
+def load_kpis(start_date=None, end_date=None, source=None) -> dict:
+    """Load headline metrics for the filtered articles."""
+
+    where, params = build_filters(start_date, end_date, source)
+    df = run_query(f"""
+        SELECT
+            COALESCE(SUM(article_count), 0) AS total_articles,
+            SUM(sentiment_sum) / NULLIF(SUM(sentiment_count), 0) AS avg_sentiment,
+            COUNT(DISTINCT source) FILTER (WHERE source <> %s AND article_count > 0) AS unique_sources,
+            SUM(word_count_sum)::DOUBLE PRECISION / NULLIF(SUM(word_count_count), 0) AS avg_word_count
+        FROM article_daily_stats
+        {where}
+    """, [NO_SOURCE] + params)
+    kpis = df.iloc[0].to_dict()
+    return kpis
+
+
+@st.cache_data(ttl=300)
+def load_daily_counts(start_date=None, end_date=None, source=None) -> pd.DataFrame:
+    """Load the number of articles published per day."""
+
+    where, params = build_filters(start_date, end_date, source)
+    df = run_query(f"""
+        SELECT
+            day AS date,
+            SUM(article_count) AS article_count
+        FROM article_daily_stats
+        {where}
+        GROUP BY 1
+        HAVING SUM(article_count) > 0
+        ORDER BY 1
+    """, params)
+    df['date'] = pd.to_datetime(df['date'])
+    return df
+
+
+@st.cache_data(ttl=300)
+def load_sentiment_distribution(start_date=None, end_date=None, source=None) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Load sentiment category counts and histogram buckets.
+
+    Returns (category counts, histogram buckets with their centre score).
+    """
+    where, params = build_filters(start_date, end_date, source)
+
+    categories = run_query(f"""
+        SELECT category, count
+        FROM (
+            SELECT
+                SUM(negative_count) AS negative,
+                SUM(neutral_count) AS neutral,
+                SUM(positive_count) AS positive
+            FROM article_daily_stats
+            {where}
+        ) AS totals
+        CROSS JOIN LATERAL (
+            VALUES ('Negative', negative), ('Neutral', neutral), ('Positive', positive)
+        ) AS categories(category, count)
+        WHERE count > 0
+        ORDER BY count DESC
+    """, params)
+
+    buckets = run_query(f"""
+        SELECT
+            bucket,
+            SUM(bucket_counts[bucket]) AS count
+        FROM article_daily_stats
+        CROSS JOIN generate_series(1, {SENTIMENT_BUCKETS}) AS bucket
+        {where}
+        GROUP BY bucket
+        HAVING SUM(bucket_counts[bucket]) > 0
+        ORDER BY bucket
+    """, params)
+    width = 2.0 / SENTIMENT_BUCKETS
+    buckets['sentiment_score'] = -1.0 + (buckets['bucket'] - 0.5) * width
+
+    return categories, buckets
+
+
+@st.cache_data(ttl=300)
+def load_top_sources(start_date=None, end_date=None, source=None, limit: int = 10) -> pd.DataFrame:
+    """Load the sources with the most articles."""
+
+    where, params = build_filters(start_date, end_date, source)
+    where = f"{where} AND source <> %s" if where else "WHERE source <> %s"
+    return run_query(f"""
         SELECT
-            id,
-            title,
             source,
-            sentiment_score,
-            word_count,
-            published_at,
-            created_at
-        FROM articles
-        ORDER BY published_at DESC
+            SUM(article_count) AS article_count
+        FROM article_daily_stats
+        {where}
+        GROUP BY source
+        HAVING SUM(article_count) > 0
+        ORDER BY article_count DESC
+        LIMIT %s
+    """, params + [NO_SOURCE, limit])
+
+
+@st.cache_data(ttl=300)
+def load_recent_runs(days: int = 30, limit: int = 20) -> pd.DataFrame:
     """
-    with get_connection() as conn:
-        df = pd.read_sql(query, conn)
+    Load the most recent pipeline runs with their log counts.
 
-    # Convert published_at to datetime
-    df['published_at'] = pd.to_datetime(df['published_at'], errors='coerce')
-    df['created_at'] = pd.to_datetime(df['created_at'], errors='coerce')
+    The cutoff is a literal timestamp, so only the pipeline_logs partitions
+    covering the last `days` days are read.
+    """
 
-    return df
+    return run_query("""
+        SELECT
+            run_id,
+            MIN(run_timestamp) AS started_at,
+            COUNT(*) FILTER (WHERE log_level = 'WARNING') AS warnings,
+            COUNT(*) FILTER (WHERE log_level = 'ERROR') AS errors
+        FROM pipeline_logs
+        WHERE run_timestamp >= %s AND run_id IS NOT NULL
+        GROUP BY run_id
+        ORDER BY started_at DESC
+        LIMIT %s
+    """, [datetime.now() - timedelta(days=days), limit])
 
 
 @st.cache_data(ttl=300)
-def load_pipeline_logs():
-    """Load recent pipeline logs for monitoring."""
+def load_pipeline_logs(run_id: str):
+    """Load the pipeline logs written by one run."""
 
-    query = """
+    return run_query("""
         SELECT
             run_timestamp,
             log_level,
             message,
             details
         FROM pipeline_logs
-        ORDER BY run_timestamp DESC
-        LIMIT 50
+        WHERE run_id = %s
+        ORDER BY id
+    """, [run_id])
+
+
+@st.cache_data(ttl=300)
+def load_stage_metrics(runs: int = 20) -> pd.DataFrame:
+    """Load top-level stage durations for the most recent pipeline runs."""
+
+    return run_query("""
+        SELECT
+            run_started_at,
+            stage,
+            wall_seconds,
+            rows_per_sec
+        FROM pipeline_run_metrics
+        WHERE run_started_at IN (
+            SELECT DISTINCT run_started_at
+            FROM pipeline_run_metrics
+            ORDER BY run_started_at DESC
+            LIMIT %s
+        )
+        AND stage NOT LIKE '%%.%%'
+        ORDER BY run_started_at, stage
+    """, [runs])
+
+
+@st.cache_data(ttl=300)
+def search_articles(terms: str, page: int = 1, start_date=None, end_date=None, source=None) -> pd.DataFrame:
     """
-    with get_connection() as conn:
-        df = pd.read_sql(query, conn)
-    return df
+    Ranked full-text search over article titles and bodies.
+
+    Matches come from the GIN index on search_vector, the newest
+    SEARCH_MAX_CANDIDATES of them are ranked, and snippets are only built
+    for the returned page. One row more than a page is fetched so the caller
+    can tell whether a next page exists without counting every match.
+    ``candidate_count`` reaches SEARCH_MAX_CANDIDATES when older matches
+    were cut off.
+    """
+    where, params = build_filters(start_date, end_date, source, date_column="published_ts")
+    where = f"{where} AND search_vector @@ query" if where else "WHERE search_vector @@ query"
+
+    return run_query(f"""
+        SELECT
+            id,
+            title,
+            source,
+            -- Undated articles are stored as '-infinity', which pandas cannot hold
+            NULLIF(published_ts, '-infinity') AS published_ts,
+            sentiment_score,
+            rank,
+            candidate_count,
+            ts_headline('english', LEFT(COALESCE(body, ''), 100000), query,
+                        'MaxFragments=1, MinWords=15, MaxWords=35, StartSel=**, StopSel=**') AS snippet
+        FROM (
+            SELECT candidates.*, ts_rank_cd(search_vector, query) AS rank,
+                COUNT(*) OVER () AS candidate_count
+            FROM (
+                SELECT articles.*, query
+                FROM articles, websearch_to_tsquery('english', %s) AS query
+                {where}
+                ORDER BY published_ts DESC, id
+                LIMIT %s
+            ) AS candidates
+            ORDER BY rank DESC, published_ts DESC NULLS LAST, id
+            LIMIT %s OFFSET %s
+        ) AS hits
+        ORDER BY rank DESC, published_ts DESC NULLS LAST, id
+    """, [terms] + params + [SEARCH_MAX_CANDIDATES, SEARCH_PAGE_SIZE + 1, (page - 1) * SEARCH_PAGE_SIZE])
 
 
 def render_header():
@@ -80,7 +393,7 @@ def render_header():
     st.divider()
 
 
-def render_metrics(df: pd.DataFrame):
+def render_metrics(kpis: dict):
     """Render key performance indicators."""
 
     col1, col2, col3, col4 = st.columns(4)
@@ -88,50 +401,44 @@ def render_metrics(df: pd.DataFrame):
     with col1:
         st.metric(
             label="Total Articles",
-            value=f"{len(df):,}"
+            value=f"{int(kpis['total_articles']):,}"
         )
 
     with col2:
-        avg_sentiment = df['sentiment_score'].mean()
-        sentiment_label = "Positive" if avg_sentiment > 0.1 else "Negative" if avg_sentiment < -0.1 else "Neutral"
-        st.metric(
-            label="Avg Sentiment",
-            value=f"{avg_sentiment:.3f}",
-            delta=sentiment_label
-        )
+        avg_sentiment = kpis['avg_sentiment']
+        if pd.isna(avg_sentiment):
+            st.metric(label="Avg Sentiment", value="n/a")
+        else:
+            sentiment_label = "Positive" if avg_sentiment > 0.1 else "Negative" if avg_sentiment < -0.1 else "Neutral"
+            st.metric(
+                label="Avg Sentiment",
+                value=f"{avg_sentiment:.3f}",
+                delta=sentiment_label
+            )
 
     with col3:
-        unique_sources = df['source'].nunique()
         st.metric(
             label="Unique Sources",
-            value=f"{unique_sources:,}"
+            value=f"{int(kpis['unique_sources']):,}"
         )
 
     with col4:
-        avg_word_count = df['word_count'].mean()
+        avg_word_count = kpis['avg_word_count']
         st.metric(
             label="Avg Word Count",
-            value=f"{avg_word_count:,.0f}"
+            value="n/a" if pd.isna(avg_word_count) else f"{avg_word_count:,.0f}"
         )
 
 
-def render_articles_over_time(df: pd.DataFrame):
+def render_articles_over_time(daily_counts: pd.DataFrame):
     """Visualization 1: Articles ingested over time."""
     
     st.subheader("📈 Articles Over Time")
 
-    # Filter out rows with invalid dates
-    df_valid = df.dropna(subset=['published_at'])
-
-    if df_valid.empty:
+    if daily_counts.empty:
         st.warning("No articles with valid publication dates")
         return
 
-    # Group by date
-    df_valid['date'] = df_valid['published_at'].dt.date
-    daily_counts = df_valid.groupby('date').size().reset_index(name='article_count')
-    daily_counts['date'] = pd.to_datetime(daily_counts['date'])
-
     fig = px.area(
         daily_counts,
         x='date',
@@ -159,7 +466,7 @@ def render_articles_over_time(df: pd.DataFrame):
         st.caption(f"**Daily Average:** {daily_counts['article_count'].mean():.1f} articles")
 
 
-def render_sentiment_trends(df: pd.DataFrame):
+def render_sentiment_trends(category_counts: pd.DataFrame, buckets: pd.DataFrame):
     """Visualization 2: Sentiment distribution and trends."""
 
     st.subheader("😊 Sentiment Analysis")
@@ -168,25 +475,10 @@ def render_sentiment_trends(df: pd.DataFrame):
 
     with col1:
         # Sentiment distribution
-        df_sentiment = df.dropna(subset=['sentiment_score'])
-
-        if df_sentiment.empty:
+        if category_counts.empty:
             st.warning("No articles with sentiment scores")
             return
 
-        # Categorize sentiment
-        def categorize_sentiment(score):
-            if score < -0.3:
-                return 'Negative'
-            elif score > 0.3:
-                return 'Positive'
-            else:
-                return 'Neutral'
-
-        df_sentiment['category'] = df_sentiment['sentiment_score'].apply(categorize_sentiment)
-        category_counts = df_sentiment['category'].value_counts().reset_index()
-        category_counts.columns = ['category', 'count']
-
         # Define colors
         color_map = {'Positive': '#2ecc71', 'Neutral': '#95a5a6', 'Negative': '#e74c3c'}
 
@@ -202,34 +494,32 @@ def render_sentiment_trends(df: pd.DataFrame):
         st.plotly_chart(fig, use_container_width=True)
 
     with col2:
-        # Sentiment histogram
-        fig = px.histogram(
-            df_sentiment,
+        # Sentiment histogram, pre-bucketed in SQL
+        fig = px.bar(
+            buckets,
             x='sentiment_score',
-            nbins=30,
+            y='count',
             title='Sentiment Score Distribution',
             labels={'sentiment_score': 'Sentiment Score', 'count': 'Articles'},
             color_discrete_sequence=['#3498db']
         )
 
+        fig.update_traces(width=2.0 / SENTIMENT_BUCKETS)
         fig.add_vline(x=0, line_dash="dash", line_color="gray", annotation_text="Neutral")
         fig.update_layout(
             xaxis_title="Sentiment Score (-1 to 1)",
-            yaxis_title="Number of Articles"
+            yaxis_title="Number of Articles",
+            bargap=0
         )
 
         st.plotly_chart(fig, use_container_width=True)
 
 
-def render_top_sources(df: pd.DataFrame):
+def render_top_sources(source_counts: pd.DataFrame, kpis: dict):
     """Visualization 3: Top news sources."""
 
     st.subheader("🏆 Top News Sources")
 
-    # Count articles by source
-    source_counts = df['source'].value_counts().head(10).reset_index()
-    source_counts.columns = ['source', 'article_count']
-
     if source_counts.empty:
         st.warning("No source data available")
         return
@@ -255,16 +545,71 @@ def render_top_sources(df: pd.DataFrame):
     st.plotly_chart(fig, use_container_width=True)
 
     # Add source diversity metric
-    total_sources = df['source'].nunique()
-    top_3_share = source_counts.head(3)['article_count'].sum() / len(df) * 100
+    total_sources = int(kpis['unique_sources'])
+    top_3_share = source_counts.head(3)['article_count'].sum() / kpis['total_articles'] * 100
     st.caption(f"**Source Diversity:** {total_sources} unique sources | Top 3 sources account for {top_3_share:.1f}% of articles")
 
 
-def render_pipeline_health(logs_df: pd.DataFrame):
-    """Show pipeline health and recent activity."""
+def render_search(filters: dict):
+    """Keyword search over stored articles, honouring the sidebar filters."""
+
+    st.subheader("🔎 Search Articles")
+
+    col1, col2 = st.columns([4, 1])
+    with col1:
+        terms = st.text_input(
+            "Search titles and article text",
+            placeholder='e.g. "interest rates" -crypto'
+        )
+    with col2:
+        page = st.number_input("Page", min_value=1, value=1, step=1)
+
+    if not terms.strip():
+        st.caption('Supports quoted phrases, "or" and -excluded words.')
+        return
+
+    results = search_articles(terms.strip(), int(page), **filters)
+    has_next = len(results) > SEARCH_PAGE_SIZE
+    results = results.head(SEARCH_PAGE_SIZE)
+    truncated = ((page - 1) * SEARCH_PAGE_SIZE >= SEARCH_MAX_CANDIDATES
+                 or (not results.empty and results['candidate_count'].iloc[0] >= SEARCH_MAX_CANDIDATES))
+    truncation_note = (f"Only the newest {SEARCH_MAX_CANDIDATES:,} matches are ranked; "
+                       "narrow the date range or search terms to reach older articles.")
+
+    if results.empty:
+        st.info("No matching articles" + (" on this page" if page > 1 else ""))
+        if truncated:
+            st.warning(truncation_note)
+        return
+
+    for _, row in results.iterrows():
+        published = row['published_ts'].strftime('%Y-%m-%d') if pd.notna(row['published_ts']) else "unknown date"
+        st.markdown(f"**{row['title'] or '(untitled)'}**  \n{row['source'] or 'Unknown source'} · {published}")
+        if row['snippet']:
+            st.caption(row['snippet'])
+
+    st.caption(f"Page {int(page)}" + (" · more results on the next page" if has_next else ""))
+    if truncated:
+        st.warning(truncation_note)
+
+
+def render_pipeline_health(logs_df: pd.DataFrame, stage_metrics: pd.DataFrame):
+    """Show pipeline health, recent activity and stage durations per run."""
 
     st.subheader("🔧 Pipeline Health")
 
+    if not stage_metrics.empty:
+        fig = px.bar(
+            stage_metrics,
+            x='run_started_at',
+            y='wall_seconds',
+            color='stage',
+            title='Stage Duration by Run',
+            labels={'run_started_at': 'Run Started', 'wall_seconds': 'Wall Time (s)', 'stage': 'Stage'},
+            hover_data=['rows_per_sec']
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
     if logs_df.empty:
         st.info("No pipeline logs available yet. Trigger the ETL pipeline to see logs here.")
         return
@@ -282,7 +627,7 @@ def render_pipeline_health(logs_df: pd.DataFrame):
             level_counts,
             values='count',
             names='level',
-            title='Log Level Distribution (Last 50 Entries)',
+            title='Log Level Distribution (Selected Run)',
             color='level',
             color_discrete_map=color_map
         )
@@ -307,16 +652,36 @@ def render_pipeline_health(logs_df: pd.DataFrame):
             st.markdown(f"**Last Activity:** {last_run}")
 
 
-def render_sidebar(df: pd.DataFrame):
-    """Render sidebar with filters and info."""
+def render_run_selector(runs: pd.DataFrame) -> str | None:
+    """Let the user pick which recent pipeline run the health panel shows."""
+
+    if runs.empty:
+        return None
+
+    labels = {
+        row['run_id']: f"{row['started_at']:%Y-%m-%d %H:%M} "
+                       f"({int(row['warnings'])} warnings, {int(row['errors'])} errors)"
+        for _, row in runs.iterrows()
+    }
+    return st.sidebar.selectbox(
+        "Pipeline Run",
+        options=list(labels),
+        format_func=labels.get
+    )
+
+
+def render_sidebar(min_date, max_date, sources: list[str]) -> dict:
+    """
+    Render sidebar with filters and info.
+
+    Returns the selected filters as keyword arguments for the load_* queries.
+    """
     
     st.sidebar.header("Filters")
+    filters = {}
 
     # Date range filter
-    if not df['published_at'].isna().all():
-        min_date = df['published_at'].min().date()
-        max_date = df['published_at'].max().date()
-
+    if min_date is not None and max_date is not None:
         date_range = st.sidebar.date_input(
             "Date Range",
             value=(min_date, max_date),
@@ -325,16 +690,13 @@ def render_sidebar(df: pd.DataFrame):
         )
 
         if len(date_range) == 2:
-            start_date, end_date = date_range
-            mask = (df['published_at'].dt.date >= start_date) & (df['published_at'].dt.date <= end_date)
-            df = df[mask]
+            filters['start_date'], filters['end_date'] = date_range
 
     # Source filter
-    sources = ['All'] + sorted(df['source'].dropna().unique().tolist())
-    selected_source = st.sidebar.selectbox("Source", sources)
+    selected_source = st.sidebar.selectbox("Source", ['All'] + sources)
 
     if selected_source != 'All':
-        df = df[df['source'] == selected_source]
+        filters['source'] = selected_source
 
     st.sidebar.divider()
     st.sidebar.header("About")
@@ -350,44 +712,57 @@ def render_sidebar(df: pd.DataFrame):
     **Data refreshes every 5 minutes.**
     """)
 
-    return df
+    return filters
 
 
 def main():
     """Main application entry point."""
     render_header()
 
-    # Load data
+    # Load filter options
     with st.spinner("Loading data..."):
-        df = load_articles()
-        logs_df = load_pipeline_logs()
+        total_articles, min_date, max_date, sources = load_filter_options()
+        runs = load_recent_runs()
+        stage_metrics = load_stage_metrics()
 
-    if df.empty:
+    if total_articles == 0:
         st.warning("No articles found in the database. Run the ETL pipeline to ingest data.")
         st.stop()
 
-    # Apply filters from sidebar
-    filtered_df = render_sidebar(df)
+    # Filters from the sidebar are pushed down into every panel's query
+    filters = render_sidebar(min_date, max_date, sources)
+    run_id = render_run_selector(runs)
+
+    with st.spinner("Loading data..."):
+        kpis = load_kpis(**filters)
+        daily_counts = load_daily_counts(**filters)
+        category_counts, buckets = load_sentiment_distribution(**filters)
+        source_counts = load_top_sources(**filters)
+        logs_df = load_pipeline_logs(run_id) if run_id else pd.DataFrame()
 
     # Render metrics
-    render_metrics(filtered_df)
+    render_metrics(kpis)
 
     st.divider()
 
     # Render visualizations
-    render_articles_over_time(filtered_df)
+    render_articles_over_time(daily_counts)
+
+    st.divider()
+
+    render_sentiment_trends(category_counts, buckets)
 
     st.divider()
 
-    render_sentiment_trends(filtered_df)
+    render_top_sources(source_counts, kpis)
 
     st.divider()
 
-    render_top_sources(filtered_df)
+    render_search(filters)
 
     st.divider()
 
-    render_pipeline_health(logs_df)
+    render_pipeline_health(logs_df, stage_metrics)
 
     # Footer
     st.divider()
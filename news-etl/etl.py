@@ -1,64 +1,146 @@
+import argparse
 import os
-import json
-from datetime import datetime
+import subprocess
+import sys
+import time
+import uuid
+from collections.abc import Callable, Iterable, Iterator
+from dataclasses import dataclass, field
+from datetime import date, datetime, timezone
+from itertools import islice
 
 import psycopg2
-from newsdataapi import NewsDataApiClient
-from textblob import TextBlob
+from article_partitions import (
+    UNDATED,
+    create_upcoming_partitions,
+    detach_article_partitions,
+    initialize_archived_months,
+    kept_archived_partitions,
+    migrate_articles_to_partitions,
+)
+from extract import (
+    MAX_CONCURRENCY,
+    MAX_PAGES,
+    ExtractError,
+    Page,
+    describe_query,
+    iter_concurrent_pages,
+    load_query_specs,
+)
+from landing import RAW_LANDING_ENABLED, iter_landed_pages, land_pages
+from load import (
+    SENTIMENT_BUCKETS,
+    backfill_daily_stats,
+    backfill_word_counts,
+    load_articles,
+    rebuild_daily_stats,
+)
+from metrics import RunMetrics
+from near_duplicates import (
+    NEAR_DUP_ENABLED,
+    NearDuplicateIndex,
+    initialize_near_duplicate_index,
+    prune_near_duplicate_index,
+)
+from pipeline_logger import PipelineLogger, drop_expired_log_partitions, initialize_log_table
+from sentiment import SENTIMENT_CACHE_ENABLED, SentimentCache, score_texts, shutdown_pool
+from seen_articles import SEEN_FILTER_ENABLED, SeenArticleFilter, initialize_seen_filter, source_hash
+from sentiment_engines import get_engine
 from validators import validate_batch
+from watermarks import CheckpointTracker, load_watermarks, spec_key
 
 
-# Read the API key from an environment variable
+# Read the API key from an environment variable; only fetching needs it
 API_KEY: str | None = os.environ.get("NEWS_API_KEY")
 
-if not API_KEY:
-    print("Error: NEWS_API_KEY environment variable not set.")
-    exit(1)
+# Where pages come from: "newsdata" (the live API) or "fake" (see fake_newsdata.py)
+NEWS_SOURCE: str = os.environ.get("NEWS_SOURCE", "newsdata").lower()
 
-api = NewsDataApiClient(apikey=API_KEY)  # type: ignore
+# Articles transformed, validated and committed together
+BATCH_SIZE: int = int(os.environ.get("ETL_BATCH_SIZE", "500"))
 
+# Rows copied per transaction while moving existing articles into partitions
+BACKFILL_BATCH_SIZE: int = int(os.environ.get("ETL_BACKFILL_BATCH_SIZE", "5000"))
 
-def log_to_db(cursor, level: str, message: str, record_id: str = None, details: dict = None) -> None:
+# Weighted full-text document: title matches rank above body matches. The
+# body is capped so an oversized article cannot exceed the tsvector size limit.
+SEARCH_VECTOR_SQL = """
+    TSVECTOR GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', COALESCE(title, '')), 'A') ||
+        setweight(to_tsvector('english', LEFT(COALESCE(body, ''), 100000)), 'B')
+    ) STORED
+"""
+
+
+@dataclass
+class RunStats:
     """
-    Log a message to the pipeline_logs table.
-    
-    Levels: INFO, WARNING, ERROR
+    Counters accumulated across pipeline stages for the run summary.
     """
-    cursor.execute("""
-        INSERT INTO pipeline_logs (log_level, message, record_id, details)
-        VALUES (%s, %s, %s, %s)
-    """, (
-        level,
-        message,
-        record_id,
-        json.dumps(details) if details else None
-    ))
 
+    pages_fetched: int = 0
+    articles_fetched: int = 0
+    duplicates_dropped: int = 0
+    articles_skipped: int = 0
+    articles_valid: int = 0
+    articles_invalid: int = 0
+    near_duplicates: int = 0
+    articles_inserted: int = 0
+    articles_updated: int = 0
+    articles_unchanged: int = 0
+    articles_archived: int = 0
+    batches_committed: int = 0
+    extract_error: ExtractError | None = field(default=None, repr=False)
+    metrics: RunMetrics = field(default_factory=RunMetrics, repr=False)
+    # None when replaying landed pages, which must not move the watermarks
+    checkpoints: CheckpointTracker | None = field(default_factory=CheckpointTracker, repr=False)
 
-def calculate_sentiment(text: str | None) -> float | None:
+
+def _newsdata_clients() -> Callable:
+    """
+    Build NewsData.io clients. Each extract worker thread gets its own.
     """
-    Calculate sentiment polarity score for given text.
+    from newsdataapi import NewsDataApiClient
+
+    return lambda: NewsDataApiClient(apikey=API_KEY)  # type: ignore
 
-    Returns a float between -1.0 (very negative) and 1.0 (very positive),
-    or None if text is empty/None.
+
+def _fake_clients() -> Callable:
+    """
+    Serve pages from the local stand-in. Workers share one client, so
+    latency and rate limits apply to the run as a whole, like an API key.
     """
-    if not text or not text.strip():
-        return None
+    from fake_newsdata import make_fake_client
 
-    try:
-        blob = TextBlob(text)
-        return round(blob.sentiment.polarity, 4)
-    except Exception as e:
-        print(f"Sentiment analysis failed: {e}")
-        return None
-    
+    client = make_fake_client()
+    return lambda: client
+
+
+SOURCES: dict[str, Callable[[], Callable]] = {
+    "newsdata": _newsdata_clients,
+    "fake": _fake_clients,
+}
 
-def get_latest_article_date(cursor) -> str | None:
+
+def _make_client_factory() -> Callable:
+    """
+    Return the client factory for the source selected by NEWS_SOURCE.
+    """
+    if NEWS_SOURCE not in SOURCES:
+        raise ValueError(f"Unknown NEWS_SOURCE {NEWS_SOURCE!r}; expected one of {sorted(SOURCES)}")
+    return SOURCES[NEWS_SOURCE]()
+
+
+def get_latest_article_date(cursor) -> datetime | None:
     """
     Query the database for the most recent article's published date.
-    Returns the latest published_at value, or None if no articles exist.
+    Returns the latest published_ts value, or None if no articles exist.
+
+    MAX() over the indexed published_ts column is answered from the end of
+    the newest partition's index instead of a sequential scan. Undated
+    articles are excluded, which also prunes their partition.
     """
-    cursor.execute("SELECT MAX(published_at) FROM articles")
+    cursor.execute("SELECT MAX(published_ts) FROM articles WHERE published_ts > %s", (UNDATED,))
     row = cursor.fetchone()
     return row[0] if row and row[0] else None
 
@@ -66,30 +148,47 @@ def get_latest_article_date(cursor) -> str | None:
 def _initialize_schema(cursor) -> None:
     """
     Create tables and handle schema evolution.
+
+    articles is partitioned by publication month (see article_partitions.py);
+    an unpartitioned table from an older version is migrated on first run.
     """
 
-    cursor.execute("""
+    cursor.execute(f"""
         CREATE TABLE IF NOT EXISTS articles (
-            id TEXT PRIMARY KEY,
+            id TEXT NOT NULL,
             title TEXT,
             author TEXT,
             body TEXT,
             source TEXT,
             published_at TEXT,
+            published_ts TIMESTAMPTZ NOT NULL,
             sentiment_score REAL,
+            content_hash TEXT,
+            cluster_id TEXT,
+            source_hash TEXT,
+            word_count INTEGER,
+            search_vector {SEARCH_VECTOR_SQL},
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            -- The partition key has to be part of the primary key
+            PRIMARY KEY (id, published_ts)
+        ) PARTITION BY RANGE (published_ts)
     """)
 
+    # Monthly-partitioned run log, pruned to the retention window on every run
+    initialize_log_table(cursor)
+    expired = drop_expired_log_partitions(cursor)
+    if expired:
+        print(f"Dropped expired pipeline_logs partitions: {', '.join(expired)}")
+
+    # Sentiment memo keyed by normalized text hash and analyzer version
     cursor.execute("""
-        CREATE TABLE IF NOT EXISTS pipeline_logs (
-            id SERIAL PRIMARY KEY,
-            run_timestamp TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            log_level TEXT NOT NULL,
-            message TEXT NOT NULL,
-            record_id TEXT,
-            details JSONB
+        CREATE TABLE IF NOT EXISTS sentiment_cache (
+            text_hash TEXT NOT NULL,
+            analyzer_version TEXT NOT NULL,
+            sentiment_score DOUBLE PRECISION NOT NULL,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (text_hash, analyzer_version)
         )
     """)
 
@@ -97,19 +196,225 @@ def _initialize_schema(cursor) -> None:
     alter_statements = [
         "ALTER TABLE articles ADD COLUMN IF NOT EXISTS sentiment_score REAL",
         "ALTER TABLE articles ADD COLUMN IF NOT EXISTS created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
-        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP"
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS content_hash TEXT",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS published_ts TIMESTAMPTZ",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS cluster_id TEXT",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS source_hash TEXT",
+        "ALTER TABLE articles ADD COLUMN IF NOT EXISTS word_count INTEGER",
+        # Once computed by the database; keeps the stored values
+        "ALTER TABLE articles ALTER COLUMN word_count DROP EXPRESSION IF EXISTS",
+        f"ALTER TABLE articles ADD COLUMN IF NOT EXISTS search_vector {SEARCH_VECTOR_SQL}"
     ]
     for stmt in alter_statements:
         cursor.execute(stmt)
 
+    # Publication day of a published_at string, or NULL if it cannot be parsed
+    cursor.execute(r"""
+        CREATE OR REPLACE FUNCTION published_day(value TEXT) RETURNS DATE AS $$
+        BEGIN
+            IF value IS NULL OR value !~ '^\d{4}-\d{2}-\d{2}' THEN
+                RETURN NULL;
+            END IF;
+            RETURN LEFT(value, 10)::DATE;
+        EXCEPTION WHEN OTHERS THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE
+    """)
+
+    # Typed publication time of a published_at string, or NULL if it cannot be parsed.
+    # NewsData.io pubDate values carry no offset and are in UTC.
+    cursor.execute("""
+        CREATE OR REPLACE FUNCTION published_timestamp(value TEXT) RETURNS TIMESTAMPTZ AS $$
+        BEGIN
+            RETURN value::TIMESTAMPTZ;
+        EXCEPTION WHEN OTHERS THEN
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql IMMUTABLE SET TimeZone = 'UTC'
+    """)
+
+    # LSH index of recent articles for near-duplicate clustering
+    initialize_near_duplicate_index(cursor)
+    pruned = prune_near_duplicate_index(cursor)
+    if pruned:
+        print(f"Pruned {pruned} articles from the near-duplicate index")
+
+    # Bloom filter of stored source fingerprints, for skipping unchanged articles
+    initialize_seen_filter(cursor)
+
+    # Raw landing zone: every fetched page, gzip-compressed, append-only
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS raw_pages (
+            id BIGSERIAL PRIMARY KEY,
+            run_id TEXT,
+            fetched_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            query JSONB NOT NULL,
+            page_number INTEGER NOT NULL,
+            next_page TEXT,
+            article_count INTEGER NOT NULL,
+            payload BYTEA NOT NULL
+        )
+    """)
+    cursor.execute("ALTER TABLE raw_pages ALTER COLUMN payload SET STORAGE EXTERNAL")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_raw_pages_fetched_at ON raw_pages (fetched_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_raw_pages_run_id ON raw_pages (run_id)")
+
+    # Per-spec extraction checkpoints, advanced with every committed batch
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS etl_watermarks (
+            query_key TEXT PRIMARY KEY,
+            query JSONB NOT NULL,
+            watermark TIMESTAMPTZ,
+            resume_cursor TEXT,
+            resume_from_date TEXT,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+    # Per-stage timings and throughput, one row per stage per run
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_run_metrics (
+            id SERIAL PRIMARY KEY,
+            run_id TEXT,
+            run_started_at TIMESTAMP NOT NULL,
+            stage TEXT NOT NULL,
+            calls INTEGER NOT NULL,
+            wall_seconds DOUBLE PRECISION NOT NULL,
+            cpu_seconds DOUBLE PRECISION NOT NULL,
+            rows_in INTEGER NOT NULL,
+            rows_out INTEGER NOT NULL,
+            rows_per_sec DOUBLE PRECISION,
+            peak_rss_kb BIGINT
+        )
+    """)
+    cursor.execute("ALTER TABLE pipeline_run_metrics ADD COLUMN IF NOT EXISTS run_id TEXT")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pipeline_run_metrics_run
+        ON pipeline_run_metrics (run_started_at)
+    """)
+
+    # One-off data migrations that have already been applied
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS schema_migrations (
+            name TEXT PRIMARY KEY,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
 
-def _transform_articles(articles_to_store: list) -> list[dict]:
+    # Daily rollup maintained by the load stage; NULL sources are stored as ''
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS article_daily_stats (
+            day DATE NOT NULL,
+            source TEXT NOT NULL,
+            article_count INTEGER NOT NULL DEFAULT 0,
+            sentiment_count INTEGER NOT NULL DEFAULT 0,
+            sentiment_sum DOUBLE PRECISION NOT NULL DEFAULT 0,
+            sentiment_sumsq DOUBLE PRECISION NOT NULL DEFAULT 0,
+            negative_count INTEGER NOT NULL DEFAULT 0,
+            neutral_count INTEGER NOT NULL DEFAULT 0,
+            positive_count INTEGER NOT NULL DEFAULT 0,
+            bucket_counts INTEGER[] NOT NULL DEFAULT array_fill(0, ARRAY[{SENTIMENT_BUCKETS}]),
+            word_count_count INTEGER NOT NULL DEFAULT 0,
+            word_count_sum BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (day, source)
+        )
+    """)
+    cursor.execute("""
+        ALTER TABLE article_daily_stats
+            ADD COLUMN IF NOT EXISTS word_count_count INTEGER NOT NULL DEFAULT 0,
+            ADD COLUMN IF NOT EXISTS word_count_sum BIGINT NOT NULL DEFAULT 0
+    """)
+
+    # Articles stored before the transform counted their words
+    count_words = not _migration_applied(cursor, "articles_word_count")
+    if count_words:
+        # Commit the schema changes first, so the dashboard reads on while rows are filled
+        cursor.connection.commit()
+        filled = backfill_word_counts(cursor, BACKFILL_BATCH_SIZE)
+        if filled:
+            print(f"Counted the words of {filled} stored articles")
+
+    # Recorded in the same transaction as the rebuild that depends on them:
+    # rollups built before sentiment was compared as NUMERIC put scores of
+    # exactly +-0.3 in the wrong category and histogram bucket, and lack the
+    # word counts just filled. Detached partitions keep their rollup cells,
+    # so the rebuild reads them too.
+    initialize_archived_months(cursor)
+    recorded = [_record_migration(cursor, migration)
+                for migration in ("article_daily_stats_numeric_sentiment", "articles_word_count")]
+    if any(recorded):
+        rebuild_daily_stats(cursor, ["articles"] + kept_archived_partitions(cursor))
+    backfill_daily_stats(cursor)
+
+    _initialize_article_partitions(cursor)
+
+
+def _migration_applied(cursor, migration: str) -> bool:
+    cursor.execute("SELECT 1 FROM schema_migrations WHERE name = %s", (migration,))
+    return cursor.fetchone() is not None
+
+
+def _record_migration(cursor, migration: str) -> bool:
+    """
+    Record the one-off data migration `migration`; True if it had not run.
+
+    The record commits together with the migration, so one that was
+    interrupted runs again on the next start.
+    """
+    cursor.execute("INSERT INTO schema_migrations (name) VALUES (%s) ON CONFLICT DO NOTHING",
+                   (migration,))
+    return cursor.rowcount == 1
+
+
+def _initialize_article_partitions(cursor) -> None:
+    """
+    Migrate an unpartitioned articles table, then make sure the partitions
+    and indexes the coming loads need exist.
+
+    published_day/published_timestamp must exist before the migration runs.
+    """
+    copied = migrate_articles_to_partitions(cursor, BACKFILL_BATCH_SIZE)
+    if copied:
+        print(f"Moved {copied} articles into monthly partitions")
+
+    create_upcoming_partitions(cursor)
+
+    # Created on the parent, so every partition gets them. CREATE INDEX only
+    # blocks writers, and the ETL is the only writer, so dashboard reads
+    # carry on while they build.
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_articles_published_ts
+        ON articles (published_ts)
+    """)
+    # Keyword search from the dashboard matches against this index
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_articles_search_vector
+        ON articles USING GIN (search_vector)
+    """)
+    cursor.connection.commit()
+
+
+def _transform_articles(articles_to_store: list, sentiment_cache: SentimentCache | None = None,
+                        metrics: RunMetrics | None = None) -> list[dict]:
     """
     Transform raw API articles into processed records with computed features.
     """
+    metrics = metrics or RunMetrics()
+
+    # Score the whole page at once so it can be spread across worker processes
+    titles = [item.get("title") for item in articles_to_store]
+    with metrics.span("transform.sentiment", rows_in=len(titles)) as span:
+        if sentiment_cache is not None:
+            sentiment_scores = sentiment_cache.score(titles)
+        else:
+            sentiment_scores = score_texts(titles)
+        span.rows_out = len(sentiment_scores)
 
     processed_articles = []
-    for item in articles_to_store:
+    for item, sentiment_score in zip(articles_to_store, sentiment_scores):
         creator = item.get("creator")
         if isinstance(creator, list):
             creator = ", ".join(creator)
@@ -124,35 +429,218 @@ def _transform_articles(articles_to_store: list) -> list[dict]:
             "body": body,
             "source": item.get("source_name"),
             "published_at": item.get("pubDate"),
-            "sentiment_score": calculate_sentiment(title),
+            "sentiment_score": sentiment_score,
+            "word_count": len(body.split()) if body else None,
+            # Set by the skip stage; computed here when it did not run
+            "source_hash": item.get("source_hash") or source_hash(item),
         }
         processed_articles.append(article)
 
     return processed_articles
 
 
-def _load_articles(cursor, valid_articles: list[dict]) -> int:
+def _plan_query_specs(cursor, logger: PipelineLogger) -> tuple[list[dict], dict[str, str]]:
     """
-    Insert validated articles into the database. Returns count of inserted articles.
+    Decide where each query spec's walk starts this run.
+
+    Returns the specs (with from_date set for incremental loads) and the
+    nextPage cursors of walks to resume, keyed by describe_query(spec).
+
+    1. A spec with a resume cursor continues its interrupted walk with the
+       from_date it started with
+    2. Otherwise a spec with a watermark fetches from the watermark's date
+    3. A spec without a checkpoint falls back to the newest stored article
+       (databases from before etl_watermarks), or a full load
     """
-    
-    inserted_count = 0
-    for article in valid_articles:
-        cursor.execute("""
-            INSERT INTO articles (id, title, author, body, source, published_at, sentiment_score)
-            VALUES (%(id)s, %(title)s, %(author)s, %(body)s, %(source)s, %(published_at)s, %(sentiment_score)s)
-            ON CONFLICT (id) DO UPDATE SET
-                title = EXCLUDED.title,
-                author = EXCLUDED.author,
-                body = EXCLUDED.body,
-                source = EXCLUDED.source,
-                published_at = EXCLUDED.published_at,
-                sentiment_score = EXCLUDED.sentiment_score,
-                updated_at = CURRENT_TIMESTAMP
-        """, article)
-        inserted_count += 1
-
-    return inserted_count
+    states = load_watermarks(cursor)
+    latest_date = get_latest_article_date(cursor)
+
+    query_specs = []
+    start_pages = {}
+    for base_spec in load_query_specs():
+        spec = dict(base_spec)
+        label = describe_query(base_spec)
+        state = states.get(spec_key(base_spec))
+
+        if state and state.resume_cursor:
+            if state.resume_from_date:
+                spec["from_date"] = state.resume_from_date
+            start_pages[describe_query(spec)] = state.resume_cursor
+            logger.log("INFO", f"Resuming interrupted extraction of {label}",
+                       details={"query": spec})
+            print(f"Resuming interrupted extraction of {label}")
+        else:
+            since = state.watermark if state and state.watermark else latest_date
+            if since:
+                # Incremental load: only fetch articles newer than what we have
+                spec["from_date"] = since.astimezone(timezone.utc).strftime("%Y-%m-%d")
+                logger.log("INFO", f"Incremental load from {spec['from_date']}",
+                           details={"query": spec})
+                print(f"Performing incremental load of {label} from {spec['from_date']}")
+            else:
+                # Full load: no existing data
+                logger.log("INFO", "Performing full load (no existing data)",
+                           details={"query": spec})
+                print(f"Performing full load of {label}")
+
+        query_specs.append(spec)
+
+    return query_specs, start_pages
+
+
+def _batched(items: Iterable, size: int) -> Iterator[list]:
+    """
+    Group an iterable into lists of at most `size` items.
+    """
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _extract_stage(logger: PipelineLogger, pages: Iterator[Page], stats: RunStats) -> Iterator[dict]:
+    """
+    EXTRACT: Flatten fetched pages into a stream of raw API articles.
+
+    A failed fetch ends the stream rather than raising, so articles already
+    received still flow through the rest of the pipeline. The error is kept
+    on stats for the caller to report.
+
+    Every page is registered with the checkpoint tracker, and articles are
+    counted as they are handed on, so the load stage knows which pages a
+    committed batch completes.
+
+    Time spent waiting for the next page is recorded as the ``extract`` span.
+    """
+    pages = iter(pages)
+    try:
+        while True:
+            with stats.metrics.span("extract") as span:
+                page = next(pages, None)
+                if page is not None:
+                    span.rows_out = len(page.articles)
+            if page is None:
+                break
+
+            stats.pages_fetched += 1
+            stats.articles_fetched += len(page.articles)
+            stats.duplicates_dropped += page.duplicates
+            if stats.checkpoints is not None:
+                stats.checkpoints.add_page(page)
+            if not page.articles:
+                continue
+
+            query_label = describe_query(page.query)
+            print(f"Fetched page {page.number} of {query_label}: {len(page.articles)} articles")
+            logger.log("INFO",
+                       f"Fetched page {page.number}: {len(page.articles)} articles from API",
+                       details={"query": page.query, "duplicates_dropped": page.duplicates})
+
+            for article in page.articles:
+                if stats.checkpoints is not None:
+                    stats.checkpoints.article_consumed()
+                yield article
+    except ExtractError as e:
+        stats.extract_error = e
+
+
+def _skip_seen_stage(raw_batches: Iterable[list], stats: RunStats,
+                     seen_filter: SeenArticleFilter | None = None) -> Iterator[list]:
+    """
+    SKIP: Drop raw articles already stored unchanged, before any work is
+    spent on them. Batches left empty are not passed on.
+    """
+    for raw_batch in raw_batches:
+        if seen_filter is not None:
+            with stats.metrics.span("skip_seen", rows_in=len(raw_batch)) as span:
+                fresh = seen_filter.filter(raw_batch)
+                stats.articles_skipped += len(raw_batch) - len(fresh)
+                span.rows_out = len(fresh)
+            if not fresh:
+                continue
+            raw_batch = fresh
+        yield raw_batch
+
+
+def _transform_stage(raw_batches: Iterable[list], stats: RunStats,
+                     sentiment_cache: SentimentCache | None = None) -> Iterator[list[dict]]:
+    """
+    TRANSFORM: Build article records with computed features, batch by batch.
+    """
+    for raw_batch in raw_batches:
+        with stats.metrics.span("transform", rows_in=len(raw_batch)) as span:
+            articles = _transform_articles(raw_batch, sentiment_cache, stats.metrics)
+            span.rows_out = len(articles)
+        yield articles
+
+
+def _validate_stage(logger: PipelineLogger, batches: Iterable[list[dict]],
+                    stats: RunStats) -> Iterator[list[dict]]:
+    """
+    VALIDATE: Check data quality before insertion, logging rejected records.
+    """
+    for batch in batches:
+        with stats.metrics.span("validate", rows_in=len(batch)) as span:
+            valid_articles, invalid_results = validate_batch(batch)
+            stats.articles_valid += len(valid_articles)
+            stats.articles_invalid += len(invalid_results)
+
+            print(f"Validation complete: {len(valid_articles)} valid, {len(invalid_results)} invalid")
+            logger.log("INFO",
+                       f"Validation: {len(valid_articles)} valid, {len(invalid_results)} invalid")
+
+            # Log invalid records; they are buffered and written with the batch
+            for result in invalid_results:
+                print(f"REJECTED article {result.record_id}: {result.errors}")
+                logger.log("WARNING", "Article failed validation",
+                           record_id=result.record_id,
+                           details={"errors": result.errors, "warnings": result.warnings})
+
+            span.rows_out = len(valid_articles)
+        yield valid_articles
+
+
+def _cluster_stage(batches: Iterable[list[dict]], stats: RunStats,
+                   index: NearDuplicateIndex | None = None) -> Iterator[list[dict]]:
+    """
+    CLUSTER: Tag each article with the cluster_id of its story, so syndicated
+    copies under different ids can be grouped.
+    """
+    for batch in batches:
+        if index is not None:
+            with stats.metrics.span("cluster", rows_in=len(batch)) as span:
+                before = index.near_duplicates
+                index.assign_clusters(batch)
+                stats.near_duplicates += index.near_duplicates - before
+                span.rows_out = len(batch)
+        yield batch
+
+
+def _load_stage(conn, cursor, logger: PipelineLogger, batches: Iterable[list[dict]],
+                stats: RunStats, seen_filter: SeenArticleFilter | None = None) -> None:
+    """
+    LOAD: Bulk upsert each validated micro-batch and commit it.
+
+    Committing per batch keeps partial progress if a later batch fails.
+    Buffered log entries and the checkpoints of the pages the batch
+    completes are written first so they commit with the batch. Committed
+    articles are then added to the seen-article filter.
+    """
+    for valid_articles in batches:
+        with stats.metrics.span("load", rows_in=len(valid_articles)) as span:
+            loaded = load_articles(cursor, valid_articles, stats.metrics)
+            stats.articles_inserted += loaded.inserted
+            stats.articles_updated += loaded.updated
+            stats.articles_unchanged += loaded.unchanged
+            stats.articles_archived += loaded.archived
+
+            if stats.checkpoints is not None:
+                stats.checkpoints.save(cursor)
+            logger.flush()
+            conn.commit()
+            stats.batches_committed += 1
+            if seen_filter is not None:
+                seen_filter.add(valid_articles)
+            span.rows_out = loaded.inserted + loaded.updated
 
 
 def _verify_data(cursor) -> None:
@@ -167,15 +655,21 @@ def _verify_data(cursor) -> None:
         print(row)
 
 
-def fetch_and_store_articles() -> None:
+def fetch_and_store_articles(metrics: RunMetrics | None = None) -> None:
     """
     Fetches news articles from NewsData.io API and stores them in a PostgreSQL database.
     
-    Pipeline stages:
-    1. EXTRACT: Fetch articles from NewsData.io API
-    2. TRANSFORM: Compute sentiment scores
-    3. VALIDATE: Check data quality before insertion
-    4. LOAD: Insert validated articles into PostgreSQL
+    Pipeline stages (chained generators, run in micro-batches of BATCH_SIZE):
+    1. EXTRACT: Fetch articles from NewsData.io API, following nextPage cursors
+    2. SKIP: Drop articles already stored unchanged (see seen_articles.py)
+    3. TRANSFORM: Compute sentiment scores
+    4. VALIDATE: Check data quality before insertion
+    5. CLUSTER: Group near-duplicate copies of a story under one cluster_id
+    6. LOAD: Insert validated articles into PostgreSQL, committing each batch
+
+    Each stage is timed (see metrics.py); the totals are written to
+    pipeline_run_metrics and included in the run summary. Pass `metrics` to
+    collect them in a RunMetrics owned by the caller, e.g. a benchmark.
     """
     POSTGRES_URL = os.environ.get("POSTGRES_URL")
     if not POSTGRES_URL:
@@ -183,99 +677,141 @@ def fetch_and_store_articles() -> None:
         return
 
     try:
+        # Tags every log entry and metrics row written by this run
+        run_id = str(uuid.uuid4())
+        run_started_at = datetime.now()
+
         with psycopg2.connect(POSTGRES_URL) as conn:
-            with conn.cursor() as cursor:
+            # Log entries are buffered and always flushed, even if the run fails
+            with conn.cursor() as cursor, PipelineLogger(cursor, run_id) as logger:
+                stats = RunStats(metrics=metrics or RunMetrics())
+
                 # Initialize database schema
-                _initialize_schema(cursor)
+                with stats.metrics.span("initialize_schema"):
+                    _initialize_schema(cursor)
 
                 # EXTRACT: Fetch from API (with incremental logic)
-                try:
-                    # Get the latest article date for incremental loading
-                    latest_date = get_latest_article_date(cursor)
-
-                    if latest_date:
-                        # Incremental load: only fetch articles newer than what we have
-                        from_date = latest_date[:10]  # Extract date portion
-                        log_to_db(cursor, "INFO", f"Incremental load from {from_date}")
-                        print(f"Performing incremental load from {from_date}")
-                        response_data = api.news_api(language="en", from_date=from_date)
+                # Each spec resumes its checkpointed walk or starts from its watermark
+                query_specs, start_pages = _plan_query_specs(cursor, logger)
+                from_dates = [spec["from_date"] for spec in query_specs if "from_date" in spec]
+                incremental = bool(from_dates)
+
+                # Query specs are fetched concurrently; pages arrive de-duplicated on article_id
+                pages = iter_concurrent_pages(_make_client_factory(), query_specs,
+                                              max_pages=MAX_PAGES, max_workers=MAX_CONCURRENCY,
+                                              metrics=stats.metrics, start_pages=start_pages)
+                if RAW_LANDING_ENABLED:
+                    # Keep every raw page so transforms can be replayed without the API
+                    pages = land_pages(cursor, pages, run_id)
+
+                sentiment_cache = SentimentCache(cursor) if SENTIMENT_CACHE_ENABLED else None
+                near_duplicate_index = NearDuplicateIndex(cursor) if NEAR_DUP_ENABLED else None
+                seen_filter = SeenArticleFilter(cursor) if SEEN_FILTER_ENABLED else None
+
+                # Stages are chained generators, so only one micro-batch is in memory at a time
+                raw_articles = _extract_stage(logger, pages, stats)
+                fresh = _skip_seen_stage(_batched(raw_articles, BATCH_SIZE), stats, seen_filter)
+                transformed = _transform_stage(fresh, stats, sentiment_cache)
+                validated = _validate_stage(logger, transformed, stats)
+                clustered = _cluster_stage(validated, stats, near_duplicate_index)
+                _load_stage(conn, cursor, logger, clustered, stats, seen_filter)
+
+                # Pages without new articles complete once extraction has drained
+                if seen_filter is not None:
+                    seen_filter.save()
+                stats.checkpoints.save(cursor)
+                conn.commit()
+
+                if stats.extract_error:
+                    e = stats.extract_error
+                    if e.response is not None:
+                        logger.log("ERROR", "API request unsuccessful",
+                                   details={"response": str(e.response), "query": e.query})
                     else:
-                        # Full load: no existing data
-                        log_to_db(cursor, "INFO", "Performing full load (no existing data)")
-                        print("Performing full load")
-                        response_data = api.news_api(language="en")
-                except Exception as e:
-                    log_to_db(cursor, "ERROR", f"API fetch failed: {str(e)}",
-                              details={"exception_type": type(e).__name__})
-                    conn.commit()
+                        logger.log("ERROR", str(e),
+                                   details={"exception_type": type(e.__cause__).__name__,
+                                            "query": e.query})
                     print(f"Failed to fetch data from API: {e}")
-                    return
 
-                if not (response_data and response_data.get("status") == "success"):
-                    log_to_db(cursor, "ERROR", "API request unsuccessful",
-                              details={"response": str(response_data)})
-                    conn.commit()
-                    print(f"API request was unsuccessful. Details: {response_data}")
-                    return
+                    if not stats.pages_fetched:
+                        stats.metrics.save(cursor, run_id, run_started_at)
+                        logger.flush()
+                        conn.commit()
+                        return
 
-                articles_to_store = response_data.get("results", [])
-                if not articles_to_store:
-                    if latest_date:
+                if not stats.articles_fetched:
+                    if incremental:
                         # This is expected for incremental loads when there's nothing new
-                        log_to_db(cursor, "INFO", "No new articles since last run")
+                        logger.log("INFO", "No new articles since last run")
+                        stats.metrics.save(cursor, run_id, run_started_at)
+                        logger.flush()
                         conn.commit()
                         print("No new articles found since last run. Pipeline complete.")
                         return
                     else:
                         # This is unexpected for a full load
-                        log_to_db(cursor, "WARNING", "No articles returned from API on full load")
+                        logger.log("WARNING", "No articles returned from API on full load")
+                        stats.metrics.save(cursor, run_id, run_started_at)
+                        logger.flush()
                         conn.commit()
                         print("No articles found to store.")
                         return
 
-                print(f"Successfully fetched {len(articles_to_store)} articles from API.")
-                log_to_db(cursor, "INFO", f"Fetched {len(articles_to_store)} articles from API")
-
-                # TRANSFORM: Build article records with computed features
-                processed_articles = _transform_articles(articles_to_store)
-
-                # VALIDATE: Check data quality before insertion
-                valid_articles, invalid_results = validate_batch(processed_articles)
+                print(f"Successfully fetched {stats.articles_fetched} articles from API "
+                      f"across {stats.pages_fetched} page(s).")
 
-                print(f"Validation complete: {len(valid_articles)} valid, {len(invalid_results)} invalid")
-                log_to_db(cursor, "INFO",
-                          f"Validation: {len(valid_articles)} valid, {len(invalid_results)} invalid")
+                if stats.articles_skipped:
+                    print(f"Skipped {stats.articles_skipped} articles already stored unchanged "
+                          f"(skip rate {seen_filter.skip_rate:.1%}).")
 
-                # Log invalid records
-                for result in invalid_results:
-                    print(f"REJECTED article {result.record_id}: {result.errors}")
-                    log_to_db(cursor, "WARNING", "Article failed validation",
-                              record_id=result.record_id,
-                              details={"errors": result.errors, "warnings": result.warnings})
-
-                if not valid_articles:
-                    log_to_db(cursor, "WARNING", "No valid articles to insert after validation")
+                if not stats.articles_valid and not stats.articles_skipped:
+                    logger.log("WARNING", "No valid articles to insert after validation")
+                    stats.metrics.save(cursor, run_id, run_started_at)
+                    logger.flush()
                     conn.commit()
                     print("No valid articles to insert after validation.")
                     return
 
-                # LOAD: Insert only validated articles
-                inserted_count = _load_articles(cursor, valid_articles)
-
                 # Log final summary
                 run_summary = {
-                    "load_type": "incremental" if latest_date else "full",
-                    "from_date": latest_date if latest_date else None,
-                    "articles_fetched": len(articles_to_store),
-                    "articles_valid": len(valid_articles),
-                    "articles_invalid": len(invalid_results),
-                    "articles_inserted": inserted_count,
+                    "load_type": "incremental" if incremental else "full",
+                    "from_date": min(from_dates) if from_dates else None,
+                    "resumed_specs": len(start_pages),
+                    "pages_fetched": stats.pages_fetched,
+                    "query_specs": len(query_specs),
+                    "articles_fetched": stats.articles_fetched,
+                    "duplicates_dropped": stats.duplicates_dropped,
+                    "articles_skipped": stats.articles_skipped,
+                    "skip_rate": seen_filter.skip_rate if seen_filter else None,
+                    "seen_filter_false_positives": seen_filter.false_positives if seen_filter else None,
+                    "seen_filter_rebuilt": seen_filter.rebuilt if seen_filter else None,
+                    "articles_valid": stats.articles_valid,
+                    "articles_invalid": stats.articles_invalid,
+                    "near_duplicates": stats.near_duplicates,
+                    "articles_inserted": stats.articles_inserted,
+                    "articles_updated": stats.articles_updated,
+                    "articles_unchanged": stats.articles_unchanged,
+                    "articles_archived": stats.articles_archived,
+                    "batch_size": BATCH_SIZE,
+                    "batches_committed": stats.batches_committed,
+                    "sentiment_cache_hits": sentiment_cache.hits if sentiment_cache else None,
+                    "sentiment_cache_misses": sentiment_cache.misses if sentiment_cache else None,
+                    "sentiment_cache_hit_rate": sentiment_cache.hit_rate if sentiment_cache else None,
+                    "stage_metrics": stats.metrics.as_dict(),
+                    "run_id": run_id,
+                    "run_started_at": run_started_at.isoformat(),
                     "run_timestamp": datetime.now().isoformat()
                 }
-                log_to_db(cursor, "INFO", "Pipeline run completed", details=run_summary)
+                logger.log("INFO", "Pipeline run completed", details=run_summary)
+                stats.metrics.save(cursor, run_id, run_started_at)
+                logger.flush()
 
                 conn.commit()
-                print(f"Successfully inserted/updated {inserted_count} articles into the database.")
+                print(f"Successfully inserted {stats.articles_inserted} and updated "
+                      f"{stats.articles_updated} articles in the database "
+                      f"({stats.articles_unchanged} unchanged).")
+                if stats.articles_archived:
+                    print(f"Discarded {stats.articles_archived} articles from archived months.")
                 print(f"Pipeline run summary: {run_summary}")
 
                 # Verification
@@ -287,6 +823,202 @@ def fetch_and_store_articles() -> None:
     except Exception as e:
         print(f"Unexpected error: {e}")
 
+    finally:
+        shutdown_pool()
+
+
+def reprocess_raw_pages(since=None, until=None, run_id: str | None = None) -> None:
+    """
+    Replay transform, validate, cluster and load over pages stored in raw_pages.
+
+    Nothing is fetched from the API and etl_watermarks is left untouched.
+    Pages are replayed in fetch order, so when an article was fetched more
+    than once its most recent version is the one that ends up stored.
+    Optional filters select pages by fetch date (inclusive) or fetching run.
+    """
+    POSTGRES_URL = os.environ.get("POSTGRES_URL")
+    if not POSTGRES_URL:
+        print("Error: POSTGRES_URL not set")
+        return
+
+    try:
+        replay_id = str(uuid.uuid4())
+        run_started_at = datetime.now()
+
+        with psycopg2.connect(POSTGRES_URL) as conn:
+            with conn.cursor() as cursor, PipelineLogger(cursor, replay_id) as logger:
+                stats = RunStats(checkpoints=None)
+
+                with stats.metrics.span("initialize_schema"):
+                    _initialize_schema(cursor)
+
+                selection = {"since": str(since) if since else None,
+                             "until": str(until) if until else None,
+                             "run_id": run_id}
+                logger.log("INFO", "Reprocessing landed pages", details=selection)
+                print(f"Reprocessing landed pages: {selection}")
+
+                pages = iter_landed_pages(conn, since=since, until=until, run_id=run_id)
+                sentiment_cache = SentimentCache(cursor) if SENTIMENT_CACHE_ENABLED else None
+                near_duplicate_index = NearDuplicateIndex(cursor) if NEAR_DUP_ENABLED else None
+
+                raw_articles = _extract_stage(logger, pages, stats)
+                transformed = _transform_stage(_batched(raw_articles, BATCH_SIZE), stats, sentiment_cache)
+                validated = _validate_stage(logger, transformed, stats)
+                clustered = _cluster_stage(validated, stats, near_duplicate_index)
+                _load_stage(conn, cursor, logger, clustered, stats)
+
+                run_summary = {
+                    "load_type": "reprocess",
+                    **selection,
+                    "pages_replayed": stats.pages_fetched,
+                    "articles_replayed": stats.articles_fetched,
+                    "articles_valid": stats.articles_valid,
+                    "articles_invalid": stats.articles_invalid,
+                    "near_duplicates": stats.near_duplicates,
+                    "articles_inserted": stats.articles_inserted,
+                    "articles_updated": stats.articles_updated,
+                    "articles_unchanged": stats.articles_unchanged,
+                    "articles_archived": stats.articles_archived,
+                    "batch_size": BATCH_SIZE,
+                    "batches_committed": stats.batches_committed,
+                    "stage_metrics": stats.metrics.as_dict(),
+                    "run_id": replay_id,
+                    "run_started_at": run_started_at.isoformat(),
+                    "run_timestamp": datetime.now().isoformat()
+                }
+                logger.log("INFO", "Reprocess run completed", details=run_summary)
+                stats.metrics.save(cursor, replay_id, run_started_at)
+                logger.flush()
+                conn.commit()
+
+                print(f"Reprocessed {stats.articles_fetched} articles from "
+                      f"{stats.pages_fetched} landed page(s): {stats.articles_inserted} inserted, "
+                      f"{stats.articles_updated} updated, {stats.articles_unchanged} unchanged.")
+
+    except psycopg2.Error as e:
+        print(f"Database error occurred: {e}")
+
+    except Exception as e:
+        print(f"Unexpected error: {e}")
+
+    finally:
+        shutdown_pool()
+
+
+def detach_old_partitions(before: date, drop: bool = False) -> None:
+    """
+    Detach (and optionally drop) articles partitions for months before `before`.
+    """
+    POSTGRES_URL = os.environ.get("POSTGRES_URL")
+    if not POSTGRES_URL:
+        print("Error: POSTGRES_URL not set")
+        return
+
+    conn = psycopg2.connect(POSTGRES_URL)
+    try:
+        detached = detach_article_partitions(conn, before, drop=drop)
+    finally:
+        conn.close()
+
+    if detached:
+        action = "Dropped" if drop else "Detached"
+        print(f"{action} articles partitions: {', '.join(detached)}")
+    else:
+        print(f"No articles partitions before {before:%Y-%m}")
+
+
+def profile_startup(top: int = 15) -> None:
+    """
+    Report where start-up time goes.
+
+    Imports are measured in a fresh interpreter with ``-X importtime`` so the
+    numbers match a cold container start. The API client library and the
+    sentiment engine are only loaded once a run fetches or scores something,
+    so they are timed separately.
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import etl"],
+                            capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+
+    # Lines look like "import time:   self [us] | cumulative | <indent>module"
+    modules = []
+    for line in result.stderr.splitlines():
+        fields = line.removeprefix("import time:").split("|")
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        name = fields[2].rstrip()
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), depth, int(fields[0]) / 1000, int(fields[1]) / 1000))
+
+    if result.returncode != 0 or not modules:
+        print(f"Could not profile imports: {result.stderr.strip()}")
+        return
+
+    total = next(cumulative for name, depth, _, cumulative in modules if depth == 0 and name == "etl")
+    print(f"Importing etl: {total:.1f} ms")
+
+    print("\nDirect imports (cumulative ms):")
+    direct = sorted((m for m in modules if m[1] == 1), key=lambda m: m[3], reverse=True)
+    for name, _, _, cumulative in direct[:top]:
+        print(f"  {cumulative:8.1f}  {name}")
+
+    print(f"\nSlowest modules (self ms, top {top}):")
+    for name, _, own, _ in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"  {own:8.1f}  {name}")
+
+    print("\nLoaded on demand:")
+    started = time.perf_counter()
+    try:
+        if NEWS_SOURCE == "newsdata":
+            import newsdataapi  # noqa: F401
+        else:
+            import fake_newsdata  # noqa: F401
+        print(f"  {(time.perf_counter() - started) * 1000:8.1f}  {NEWS_SOURCE} client (first fetch)")
+    except ImportError as e:
+        print(f"  {NEWS_SOURCE} client unavailable: {e}")
+
+    started = time.perf_counter()
+    try:
+        engine = get_engine()
+        print(f"  {(time.perf_counter() - started) * 1000:8.1f}  {engine.name} sentiment engine "
+              f"(first transform)")
+    except (ImportError, ValueError) as e:
+        print(f"  Sentiment engine unavailable: {e}")
+
+
+def _parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="News ETL pipeline")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Report import and start-up times, then exit")
+    commands = parser.add_subparsers(dest="command")
+
+    reprocess = commands.add_parser(
+        "reprocess", help="Replay transform/validate/load from raw_pages without calling the API")
+    reprocess.add_argument("--since", type=date.fromisoformat, help="First fetch date (YYYY-MM-DD)")
+    reprocess.add_argument("--until", type=date.fromisoformat, help="Last fetch date (YYYY-MM-DD)")
+    reprocess.add_argument("--run-id", help="Only replay pages fetched by this run")
+
+    detach = commands.add_parser(
+        "detach-partitions", help="Detach articles partitions older than a month, for archiving")
+    detach.add_argument("--before", type=date.fromisoformat, required=True,
+                        help="Detach months before the one containing this date (YYYY-MM-DD)")
+    detach.add_argument("--drop", action="store_true", help="Drop partitions once detached")
+
+    return parser.parse_args(argv)
+
 
 if __name__ == "__main__":
-    fetch_and_store_articles()
\ No newline at end of file
+    args = _parse_args()
+
+    if args.profile_startup:
+        profile_startup()
+    elif args.command == "reprocess":
+        reprocess_raw_pages(since=args.since, until=args.until, run_id=args.run_id)
+    elif args.command == "detach-partitions":
+        detach_old_partitions(args.before, drop=args.drop)
+    else:
+        if NEWS_SOURCE == "newsdata" and not API_KEY:
+            print("Error: NEWS_API_KEY environment variable not set.")
+            exit(1)
+        fetch_and_store_articles()
\ No newline at end of file
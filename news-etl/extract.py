@@ -0,0 +1,251 @@
+"""
+Extraction helpers for the news ETL pipeline.
+
+NewsData.io returns results one page at a time. Each response carries a
+``nextPage`` cursor that must be passed back as ``page`` to get the next
+slice of the result window. This module walks those cursors so the pipeline
+is no longer capped at a single page per run, and fans several query specs
+(per country, category, domain list, ...) out over a bounded thread pool so
+extract time tracks the slowest slice rather than the sum of all slices.
+"""
+
+import json
+import os
+import queue
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from metrics import RunMetrics
+
+
+# Every page costs one API credit, so the page count doubles as a credit budget
+MAX_PAGES: int = int(os.environ.get("NEWS_API_MAX_PAGES", "10"))
+
+# Upper bound on query specs fetched at the same time
+MAX_CONCURRENCY: int = int(os.environ.get("NEWS_API_CONCURRENCY", "4"))
+
+DEFAULT_QUERY_SPECS: list[dict] = [{"language": "en"}]
+
+_DONE = object()
+
+
+class ExtractError(Exception):
+    """
+    Raised when a page cannot be fetched from the API.
+
+    Carries the raw response (if any) so the caller can log it.
+    """
+
+    def __init__(self, message: str, response: Any = None, query: dict | None = None):
+        super().__init__(message)
+        self.response = response
+        self.query = query
+
+
+@dataclass
+class Page:
+    """
+    A single page of raw API results.
+    """
+
+    number: int
+    articles: list[dict]
+    next_page: str | None = None
+    query: dict = field(default_factory=dict)
+    duplicates: int = 0
+    last: bool = False
+    response: dict | None = field(default=None, repr=False)
+
+
+def _reached_watermark(articles: list[dict], watermark: str) -> bool:
+    """
+    Check whether a page reaches back past the incremental watermark.
+
+    Results arrive newest first, so once any article on a page was published
+    before the watermark, the following pages only hold older articles.
+    """
+    for article in articles:
+        published = article.get("pubDate")
+        if published and published < watermark:
+            return True
+    return False
+
+
+def drop_seen_articles(page: Page, seen_ids: set[str]) -> None:
+    """
+    Remove articles whose ``article_id`` is in `seen_ids` from `page`,
+    counting them on ``Page.duplicates``, and add the page's ids to it.
+
+    The first copy of a repeated article is the one kept.
+    """
+    unique = []
+    for article in page.articles:
+        article_id = article.get("article_id")
+        if article_id:
+            if article_id in seen_ids:
+                page.duplicates += 1
+                continue
+            seen_ids.add(article_id)
+        unique.append(article)
+    page.articles = unique
+
+
+def iter_pages(client, watermark: str | None = None, max_pages: int = MAX_PAGES,
+               metrics: RunMetrics | None = None, start_page: str | None = None,
+               **query) -> Iterator[Page]:
+    """
+    Yield pages from the NewsData.io API, following ``nextPage`` cursors.
+
+    Pages are yielded as soon as they arrive so that transform and load can
+    start before the last page lands. Walking stops when:
+    1. The API has no further pages
+    2. A page reaches back past the watermark (incremental loads)
+    3. The page budget (max_pages) is exhausted
+
+    The final page of a finished walk (1 or 2) is flagged with ``last``.
+    When the page budget runs out first, the walk is left open: no page is
+    flagged, so its ``nextPage`` cursor is checkpointed and the next run
+    continues the walk instead of skipping the pages it never reached. A
+    walk interrupted earlier can be resumed by passing the ``nextPage``
+    cursor it stopped at as ``start_page``.
+
+    Each request is timed as the ``extract.fetch`` span.
+
+    Raises ExtractError if a request fails or returns an unsuccessful status.
+    """
+    metrics = metrics or RunMetrics()
+    cursor = start_page
+
+    for number in range(1, max_pages + 1):
+        params = dict(query)
+        if cursor:
+            params["page"] = cursor
+
+        with metrics.span("extract.fetch") as span:
+            try:
+                response = client.news_api(**params)
+            except Exception as e:
+                raise ExtractError(f"API fetch failed: {e}", query=query) from e
+            if isinstance(response, dict):
+                span.rows_out = len(response.get("results") or [])
+
+        if not (response and response.get("status") == "success"):
+            raise ExtractError("API request unsuccessful", response=response, query=query)
+
+        articles = response.get("results") or []
+        cursor = response.get("nextPage")
+        last = (not cursor or not articles
+                or bool(watermark and _reached_watermark(articles, watermark)))
+        yield Page(number=number, articles=articles, next_page=cursor, query=query, last=last,
+                   response=response)
+
+        if last:
+            return
+
+
+def load_query_specs() -> list[dict]:
+    """
+    Read the query specs for this run from NEWS_QUERY_SPECS.
+
+    The variable holds a JSON list of keyword-argument dicts for
+    ``news_api``, e.g. ``[{"language": "en", "country": "us"},
+    {"language": "en", "category": "business"}]``.
+    """
+    raw = os.environ.get("NEWS_QUERY_SPECS")
+    if not raw:
+        return [dict(spec) for spec in DEFAULT_QUERY_SPECS]
+
+    specs = json.loads(raw)
+    if not isinstance(specs, list) or not all(isinstance(spec, dict) for spec in specs):
+        raise ValueError("NEWS_QUERY_SPECS must be a JSON list of objects")
+    return specs
+
+
+def describe_query(query: dict) -> str:
+    """
+    Render a query spec as a short, stable label for logs.
+    """
+    return json.dumps(query, sort_keys=True)
+
+
+def iter_concurrent_pages(make_client: Callable[[], Any], specs: list[dict],
+                          watermark: str | None = None, max_pages: int = MAX_PAGES,
+                          max_workers: int = MAX_CONCURRENCY,
+                          metrics: RunMetrics | None = None,
+                          start_pages: dict[str, str] | None = None) -> Iterator[Page]:
+    """
+    Fetch several query specs concurrently and merge their pages.
+
+    Each spec is walked by ``iter_pages`` on its own worker thread with its
+    own client, at most ``max_workers`` at a time. Pages are yielded in the
+    order they arrive, with articles whose ``article_id`` was already seen in
+    this run removed (the count is kept on ``Page.duplicates``).
+
+    A spec's own ``from_date`` is used as its watermark when present.
+    ``start_pages`` maps ``describe_query(spec)`` to a ``nextPage`` cursor
+    for specs that resume an interrupted walk.
+
+    A failing spec does not stop the others. Once every spec has finished,
+    the first ExtractError raised by any of them is re-raised.
+    """
+    # Bounded so workers cannot run far ahead of transform and load
+    pages: queue.Queue = queue.Queue(maxsize=max(max_workers, 1) * 2)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def worker(spec: dict) -> None:
+        try:
+            for page in iter_pages(make_client(), watermark=spec.get("from_date", watermark),
+                                   max_pages=max_pages, metrics=metrics,
+                                   start_page=(start_pages or {}).get(describe_query(spec)),
+                                   **spec):
+                if not put(page):
+                    return
+        except ExtractError as e:
+            put(e)
+        except Exception as e:
+            error = ExtractError(f"API fetch failed: {e}", query=spec)
+            error.__cause__ = e
+            put(error)
+        finally:
+            put(_DONE)
+
+    seen_ids: set[str] = set()
+    errors: list[ExtractError] = []
+    remaining = len(specs)
+
+    executor = ThreadPoolExecutor(max_workers=max(max_workers, 1), thread_name_prefix="extract")
+    try:
+        for spec in specs:
+            executor.submit(worker, spec)
+
+        while remaining:
+            item = pages.get()
+            if item is _DONE:
+                remaining -= 1
+                continue
+            if isinstance(item, ExtractError):
+                print(f"Query {describe_query(item.query or {})} failed: {item}")
+                errors.append(item)
+                continue
+
+            drop_seen_articles(item, seen_ids)
+            yield item
+    finally:
+        # Unblock any worker still waiting on a full queue if we stop early
+        stop.set()
+        executor.shutdown(wait=True)
+
+    if errors:
+        raise errors[0]
@@ -0,0 +1,354 @@
+"""
+Local stand-in for the NewsData.io API.
+
+Selected with ``NEWS_SOURCE=fake``, it lets the pipeline run end to end with
+no API key or network, e.g. for benchmarks and load tests. Clients expose
+the same ``news_api(**params)`` call as ``NewsDataApiClient`` and return
+NewsData-shaped responses (``status``, ``totalResults``, ``results``,
+``nextPage``).
+
+Two providers are available:
+
+- ``FakeNewsDataClient`` generates deterministic synthetic pages: title and
+  body lengths drawn from log-normal distributions, a mix of positive,
+  negative and neutral wording, articles repeated within and across query
+  specs, syndicated copies of shared wire stories under their own ids
+  (lightly edited or cut short), and a share of malformed records (missing
+  ids, missing or blank content, unparseable dates, a creator that is not a
+  list). Sentiment scores and word counts are computed by the pipeline, so
+  no raw field can carry an out-of-range value
+- ``FixtureNewsDataClient`` replays recorded responses from a JSONL file,
+  one response per line; ``python fake_newsdata.py record`` writes such a
+  file from the raw_pages landing zone
+
+Both can add per-request latency and answer every Nth request with a
+rate-limit error.
+
+Configuration (environment):
+- FAKE_NEWS_FIXTURE: JSONL file to replay instead of generating pages
+- FAKE_NEWS_TOTAL: articles available per query spec (default 1000)
+- FAKE_NEWS_PAGE_SIZE: articles per page (default 10, as on the free tier)
+- FAKE_NEWS_SEED: seed for generated pages (default 0)
+- FAKE_NEWS_DUPLICATE_RATE: share of repeated articles (default 0.05)
+- FAKE_NEWS_SYNDICATED_RATE: share of articles that are near-duplicate
+  copies of a wire story (default 0.05)
+- FAKE_NEWS_MALFORMED_RATE: share of malformed articles (default 0.02)
+- FAKE_NEWS_TITLE_WORDS / FAKE_NEWS_BODY_WORDS: median title and body
+  length in words (default 10 / 400)
+- FAKE_NEWS_BODY_SIGMA: spread of the log-normal body length (default 0.7)
+- FAKE_NEWS_LATENCY_MS: delay added to every request (default 0)
+- FAKE_NEWS_RATE_LIMIT_EVERY: answer every Nth request with a rate-limit
+  error, 0 to disable (default 0)
+"""
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+
+
+_POSITIVE = ("surge", "record", "win", "growth", "breakthrough", "celebrate", "strong",
+             "improve", "success", "boost", "great", "excellent", "happy", "best")
+_NEGATIVE = ("crash", "loss", "crisis", "decline", "fail", "weak", "fear", "worst",
+             "terrible", "bad", "sad", "collapse", "disaster", "angry")
+_NEUTRAL = ("market", "government", "report", "city", "company", "official", "week",
+            "plan", "season", "data", "council", "industry", "team", "policy", "study",
+            "minister", "river", "election", "school", "energy", "health", "budget",
+            "the", "a", "of", "to", "in", "and", "for", "on", "with", "after", "said")
+_SOURCES = tuple(f"source_{n:02d}" for n in range(40))
+_AUTHORS = ("Alex Kim", "Sam Patel", "Jordan Lee", "Casey Morgan", "Riley Chen", "Taylor Brooks")
+
+# Shared ids that every query spec can repeat, so duplicates also cross specs
+_SHARED_IDS = 500
+
+# Wire stories that syndicated copies are drawn from
+_WIRE_STORIES = 200
+
+# Newest article date; generated pages walk back from here
+_BASE_TIME = datetime(2026, 1, 31, 23, 0, 0)
+
+
+def _env_float(name: str, default: str) -> float:
+    return float(os.environ.get(name, default))
+
+
+class _RequestPolicy:
+    """
+    Latency and rate-limit behaviour shared by both providers.
+    """
+
+    def __init__(self, latency_ms: float = 0.0, rate_limit_every: int = 0):
+        self.latency_ms = latency_ms
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def before_request(self) -> dict | None:
+        """
+        Apply latency, then return a rate-limit response if this request is throttled.
+        """
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000.0)
+        with self._lock:
+            self.requests += 1
+            number = self.requests
+        if self.rate_limit_every and number % self.rate_limit_every == 0:
+            return {
+                "status": "error",
+                "results": {
+                    "message": "Rate limit exceeded. Please try again later.",
+                    "code": "RateLimitExceeded",
+                },
+            }
+        return None
+
+
+def _words(rng: random.Random, count: int, tone: float) -> str:
+    """
+    Draw `count` words, leaning positive (tone > 0) or negative (tone < 0).
+    """
+    weights = (0.15 + 0.15 * max(tone, 0), 0.15 + 0.15 * max(-tone, 0), 0.7)
+    pools = rng.choices((_POSITIVE, _NEGATIVE, _NEUTRAL), weights=weights, k=count)
+    return " ".join(rng.choice(pool) for pool in pools)
+
+
+def _lognormal_count(rng: random.Random, median: float, sigma: float, low: int, high: int) -> int:
+    return max(low, min(high, int(rng.lognormvariate(math.log(median), sigma))))
+
+
+def generate_article(rng: random.Random, article_id: str, published: datetime,
+                     malformed_rate: float = 0.0, title_words: int = 10,
+                     body_words: int = 400, body_sigma: float = 0.7) -> dict:
+    """
+    Build one NewsData-shaped article, occasionally malformed.
+
+    Title and body word counts are log-normal around the given medians.
+    """
+    tone = rng.uniform(-1.0, 1.0)
+    title = _words(rng, _lognormal_count(rng, title_words, 0.35, 1, 60), tone).capitalize()
+    body = _words(rng, _lognormal_count(rng, body_words, body_sigma, 1, 20 * body_words), tone)
+
+    article = {
+        "article_id": article_id,
+        "title": title,
+        "link": f"https://example.com/news/{article_id}",
+        "creator": rng.sample(_AUTHORS, rng.randint(1, 2)) if rng.random() < 0.8 else None,
+        "description": _words(rng, 25, tone),
+        "content": body,
+        "pubDate": published.strftime("%Y-%m-%d %H:%M:%S"),
+        "source_id": None,
+        "source_name": rng.choice(_SOURCES),
+        "language": "english",
+    }
+    article["source_id"] = article["source_name"]
+
+    if rng.random() < malformed_rate:
+        defect = rng.randrange(5)
+        if defect == 0:
+            article["article_id"] = None
+        elif defect == 1:
+            article["title"] = None
+            article["content"] = None
+        elif defect == 2:
+            article["pubDate"] = "not-a-date"
+        elif defect == 3:
+            article["title"] = ""
+            article["content"] = "   "
+        else:
+            article["creator"] = "not-a-list"
+    return article
+
+
+def syndicate(rng: random.Random, story: dict) -> dict:
+    """
+    Rewrite a wire story as another outlet would run it: own source and
+    byline, a few words swapped and, sometimes, the tail cut off.
+    """
+    words = story["content"].split()
+    for position in rng.sample(range(len(words)), min(len(words), rng.randint(0, 4))):
+        words[position] = rng.choice(_NEUTRAL)
+    if rng.random() < 0.3:
+        words = words[:max(1, int(len(words) * rng.uniform(0.8, 1.0)))]
+
+    article = dict(story, content=" ".join(words), source_name=rng.choice(_SOURCES),
+                   creator=rng.sample(_AUTHORS, 1) if rng.random() < 0.8 else None)
+    article["source_id"] = article["source_name"]
+    return article
+
+
+class FakeNewsDataClient:
+    """
+    Serves deterministic synthetic pages for any query.
+
+    Each query spec (ignoring ``page`` and ``from_date``) gets its own
+    stream of `total` articles, newest first, spaced a few minutes apart.
+    ``from_date`` cuts the stream off at that date, like the real API.
+    """
+
+    def __init__(self, total: int = 1000, page_size: int = 10, seed: int = 0,
+                 duplicate_rate: float = 0.05, malformed_rate: float = 0.02,
+                 latency_ms: float = 0.0, rate_limit_every: int = 0,
+                 title_words: int = 10, body_words: int = 400, body_sigma: float = 0.7,
+                 syndicated_rate: float = 0.05):
+        self.total = total
+        self.page_size = page_size
+        self.seed = seed
+        self.duplicate_rate = duplicate_rate
+        self.syndicated_rate = syndicated_rate
+        self.malformed_rate = malformed_rate
+        self.title_words = title_words
+        self.body_words = body_words
+        self.body_sigma = body_sigma
+        self.policy = _RequestPolicy(latency_ms, rate_limit_every)
+
+    def article(self, spec_tag: str, index: int) -> dict:
+        """
+        Return the article at position `index` of a spec's stream.
+        """
+        rng = random.Random(f"{self.seed}:{spec_tag}:{index}")
+        published = _BASE_TIME - timedelta(minutes=7 * index + rng.randrange(7))
+        if rng.random() < self.duplicate_rate:
+            article_id = f"fake-shared-{rng.randrange(_SHARED_IDS)}"
+        else:
+            article_id = f"fake-{spec_tag}-{index}"
+
+        # Drawn from its own stream so the rate does not reshuffle other articles
+        wire = random.Random(f"{self.seed}:{spec_tag}:{index}:wire")
+        if wire.random() < self.syndicated_rate:
+            story = generate_article(random.Random(f"{self.seed}:wire:{wire.randrange(_WIRE_STORIES)}"),
+                                     article_id, published, 0.0,
+                                     self.title_words, self.body_words, self.body_sigma)
+            return syndicate(wire, story)
+
+        return generate_article(rng, article_id, published, self.malformed_rate,
+                                self.title_words, self.body_words, self.body_sigma)
+
+    def news_api(self, page: str | None = None, from_date: str | None = None, **query) -> dict:
+        throttled = self.policy.before_request()
+        if throttled is not None:
+            return throttled
+
+        spec_tag = hashlib.sha1(json.dumps(query, sort_keys=True).encode()).hexdigest()[:8]
+        start = int(page or 0)
+        results = []
+        for index in range(start, min(start + self.page_size, self.total)):
+            article = self.article(spec_tag, index)
+            if from_date and article["pubDate"] != "not-a-date" and article["pubDate"][:10] < from_date:
+                break
+            results.append(article)
+
+        end = start + len(results)
+        has_more = len(results) == self.page_size and end < self.total
+        return {
+            "status": "success",
+            "totalResults": self.total,
+            "results": results,
+            "nextPage": str(end) if has_more else None,
+        }
+
+
+class FixtureNewsDataClient:
+    """
+    Replays recorded API responses from a JSONL file, one page per line.
+
+    Every query walks the same recording; ``nextPage`` cursors are the line
+    numbers, whatever the recorded cursors were.
+    """
+
+    def __init__(self, path: str, latency_ms: float = 0.0, rate_limit_every: int = 0):
+        with open(path, encoding="utf-8") as fixture:
+            self.responses = [json.loads(line) for line in fixture if line.strip()]
+        self.policy = _RequestPolicy(latency_ms, rate_limit_every)
+
+    def news_api(self, page: str | None = None, **query) -> dict:
+        throttled = self.policy.before_request()
+        if throttled is not None:
+            return throttled
+
+        index = int(page or 0)
+        if index >= len(self.responses):
+            return {"status": "success", "totalResults": 0, "results": [], "nextPage": None}
+
+        response = dict(self.responses[index])
+        response["nextPage"] = str(index + 1) if index + 1 < len(self.responses) else None
+        return response
+
+
+def make_fake_client():
+    """
+    Build a fake client from the FAKE_NEWS_* environment variables.
+    """
+    latency_ms = _env_float("FAKE_NEWS_LATENCY_MS", "0")
+    rate_limit_every = int(os.environ.get("FAKE_NEWS_RATE_LIMIT_EVERY", "0"))
+
+    fixture = os.environ.get("FAKE_NEWS_FIXTURE")
+    if fixture:
+        return FixtureNewsDataClient(fixture, latency_ms, rate_limit_every)
+
+    return FakeNewsDataClient(
+        total=int(os.environ.get("FAKE_NEWS_TOTAL", "1000")),
+        page_size=int(os.environ.get("FAKE_NEWS_PAGE_SIZE", "10")),
+        seed=int(os.environ.get("FAKE_NEWS_SEED", "0")),
+        duplicate_rate=_env_float("FAKE_NEWS_DUPLICATE_RATE", "0.05"),
+        malformed_rate=_env_float("FAKE_NEWS_MALFORMED_RATE", "0.02"),
+        latency_ms=latency_ms,
+        rate_limit_every=rate_limit_every,
+        title_words=int(os.environ.get("FAKE_NEWS_TITLE_WORDS", "10")),
+        body_words=int(os.environ.get("FAKE_NEWS_BODY_WORDS", "400")),
+        body_sigma=_env_float("FAKE_NEWS_BODY_SIGMA", "0.7"),
+        syndicated_rate=_env_float("FAKE_NEWS_SYNDICATED_RATE", "0.05"),
+    )
+
+
+def record_fixture(path: str, run_id: str | None = None, limit: int | None = None) -> int:
+    """
+    Write landed raw_pages responses to a JSONL fixture. Returns the page count.
+    """
+    import psycopg2
+    from landing import decompress_payload
+
+    where = "WHERE run_id = %s" if run_id else ""
+    params = [run_id] if run_id else []
+    limit_clause = f"LIMIT {int(limit)}" if limit else ""
+
+    with psycopg2.connect(os.environ["POSTGRES_URL"]) as conn, conn.cursor() as cursor:
+        cursor.execute(f"SELECT payload FROM raw_pages {where} ORDER BY id {limit_clause}", params)
+        with open(path, "w", encoding="utf-8") as fixture:
+            count = 0
+            for payload, in cursor:
+                fixture.write(json.dumps(decompress_payload(bytes(payload)), ensure_ascii=False))
+                fixture.write("\n")
+                count += 1
+    return count
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local NewsData.io stand-in")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record = commands.add_parser("record", help="Export landed pages to a JSONL fixture")
+    record.add_argument("--out", required=True, help="Fixture file to write")
+    record.add_argument("--run-id", help="Only export pages fetched by this run")
+    record.add_argument("--limit", type=int, help="Maximum number of pages")
+
+    sample = commands.add_parser("sample", help="Print generated pages as JSONL")
+    sample.add_argument("--pages", type=int, default=1)
+
+    args = parser.parse_args()
+    if args.command == "record":
+        pages = record_fixture(args.out, run_id=args.run_id, limit=args.limit)
+        print(f"Wrote {pages} page(s) to {args.out}")
+    else:
+        client = make_fake_client()
+        cursor = None
+        for _ in range(args.pages):
+            response = client.news_api(page=cursor, language="en")
+            print(json.dumps(response, ensure_ascii=False))
+            cursor = response.get("nextPage")
+            if not cursor:
+                break
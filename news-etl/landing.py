@@ -0,0 +1,115 @@
+"""
+Raw landing zone for the news ETL pipeline.
+
+Every page fetched from the API is stored verbatim in ``raw_pages`` as a
+gzip-compressed JSON document before any transformation, so transform,
+validate and load can be replayed later without spending API credits.
+
+The landing zone lives in PostgreSQL rather than on disk because the ETL
+container is removed after every run. Payloads are compressed here, and the
+column is stored EXTERNAL so PostgreSQL does not try to compress them again.
+"""
+
+import gzip
+import json
+import os
+from collections.abc import Iterator
+from datetime import date
+
+import psycopg2
+from extract import Page, drop_seen_articles
+
+
+RAW_LANDING_ENABLED: bool = os.environ.get("RAW_LANDING", "true").lower() == "true"
+
+# Landed pages fetched from the server per round trip while replaying
+REPLAY_FETCH_SIZE: int = 100
+
+
+def compress_payload(response: dict) -> bytes:
+    return gzip.compress(json.dumps(response, ensure_ascii=False).encode("utf-8"))
+
+
+def decompress_payload(payload: bytes) -> dict:
+    return json.loads(gzip.decompress(payload))
+
+
+def land_pages(cursor, pages: Iterator[Page], run_id: str | None = None) -> Iterator[Page]:
+    """
+    Store each page's raw response in raw_pages, then pass the page on.
+
+    The insert joins the current transaction, so a landed page commits
+    together with the micro-batch that loads its articles.
+    """
+    for page in pages:
+        if page.response is not None:
+            cursor.execute("""
+                INSERT INTO raw_pages (run_id, query, page_number, next_page, article_count, payload)
+                VALUES (%s, %s, %s, %s, %s, %s)
+            """, (
+                run_id,
+                json.dumps(page.query),
+                page.number,
+                page.next_page,
+                len(page.response.get("results") or []),
+                compress_payload(page.response),
+            ))
+        yield page
+
+
+def iter_landed_pages(conn, since: date | None = None, until: date | None = None,
+                      run_id: str | None = None) -> Iterator[Page]:
+    """
+    Yield landed pages in the order they were fetched.
+
+    Filters on fetch date (inclusive bounds) and run. Rows are streamed with
+    a server-side cursor declared WITH HOLD, so it survives the per-batch
+    commits of the load stage.
+
+    Within each fetching run, repeats of an ``article_id`` are dropped as
+    the live run dropped them, keeping the first copy, so replaying
+    unchanged pages rewrites nothing. Across runs the later fetch still
+    wins.
+    """
+    clauses = []
+    params = []
+    if since is not None:
+        clauses.append("fetched_at >= %s")
+        params.append(since)
+    if until is not None:
+        clauses.append("fetched_at < %s::DATE + 1")
+        params.append(until)
+    if run_id is not None:
+        clauses.append("run_id = %s")
+        params.append(run_id)
+    where = "WHERE " + " AND ".join(clauses) if clauses else ""
+
+    cursor = conn.cursor(name="raw_pages_replay", withhold=True)
+    try:
+        cursor.itersize = REPLAY_FETCH_SIZE
+        cursor.execute(f"""
+            SELECT run_id, query, page_number, next_page, payload
+            FROM raw_pages
+            {where}
+            ORDER BY id
+        """, params)
+        current_run, seen_ids = None, set()
+        for page_run_id, query, page_number, next_page, payload in cursor:
+            if page_run_id != current_run:
+                current_run, seen_ids = page_run_id, set()
+            response = decompress_payload(bytes(payload))
+            page = Page(
+                number=page_number,
+                articles=response.get("results") or [],
+                next_page=next_page,
+                query=query,
+                response=response,
+            )
+            drop_seen_articles(page, seen_ids)
+            yield page
+    finally:
+        try:
+            cursor.close()
+        except psycopg2.Error:
+            # A failed load rolled back the transaction, which already dropped the cursor
+            pass
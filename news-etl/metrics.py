@@ -0,0 +1,149 @@
+"""
+Stage timing and throughput instrumentation for the news ETL pipeline.
+
+A RunMetrics collects named spans (``extract``, ``transform``, ``load.copy``,
+...). Each span adds its wall time, CPU time and row counts to the stage of
+the same name, so a stage that runs once per page or per micro-batch ends up
+with run totals. Sub-steps use dotted names under their stage.
+
+CPU time is measured with ``time.thread_time``, i.e. for the thread that ran
+the span. Work done in the sentiment process pool is therefore visible as
+transform wall time but not CPU time. Peak RSS is the process high-water
+mark observed when a span ends.
+"""
+
+import math
+import resource
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+
+
+@dataclass
+class StageMetrics:
+    """
+    Accumulated measurements for one pipeline stage or sub-step.
+    """
+
+    stage: str
+    calls: int = 0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    rows_in: int = 0
+    rows_out: int = 0
+    peak_rss_kb: int = 0
+
+    @property
+    def rows_per_sec(self) -> float | None:
+        """Rows produced per second of wall time, or rows consumed if none were produced."""
+        if not self.wall_seconds:
+            return None
+        return (self.rows_out or self.rows_in) / self.wall_seconds
+
+
+@dataclass
+class Span:
+    """
+    Row counts reported by the code inside a single span.
+    """
+
+    rows_in: int = 0
+    rows_out: int = 0
+
+
+def _peak_rss_kb() -> int:
+    # ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+class RunMetrics:
+    """
+    Stage metrics for one pipeline run.
+
+    Spans may be opened from extract worker threads, so updates are locked.
+    With ``record_samples`` the wall time of every span is also kept, so
+    benchmarks can report latency percentiles per stage.
+    """
+
+    def __init__(self, record_samples: bool = False):
+        self.stages: dict[str, StageMetrics] = {}
+        self.samples: dict[str, list[float]] | None = {} if record_samples else None
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def span(self, stage: str, rows_in: int = 0) -> Iterator[Span]:
+        """
+        Time the enclosed block and add it to `stage`.
+
+        The block may set ``rows_out`` (and adjust ``rows_in``) on the
+        yielded Span. Time is recorded even if the block raises.
+        """
+        span = Span(rows_in=rows_in)
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield span
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+            rss = _peak_rss_kb()
+            with self._lock:
+                metrics = self.stages.setdefault(stage, StageMetrics(stage=stage))
+                metrics.calls += 1
+                metrics.wall_seconds += wall
+                metrics.cpu_seconds += cpu
+                metrics.rows_in += span.rows_in
+                metrics.rows_out += span.rows_out
+                metrics.peak_rss_kb = max(metrics.peak_rss_kb, rss)
+                if self.samples is not None:
+                    self.samples.setdefault(stage, []).append(wall)
+
+    def percentile(self, stage: str, q: float) -> float | None:
+        """
+        Wall time (seconds) of the q-th percentile span of `stage`, 0 <= q <= 100.
+
+        Uses the nearest-rank method. Returns None unless samples are recorded.
+        """
+        if not self.samples or not self.samples.get(stage):
+            return None
+        with self._lock:
+            ordered = sorted(self.samples[stage])
+        rank = max(1, math.ceil(q / 100 * len(ordered)))
+        return ordered[rank - 1]
+
+    def as_dict(self) -> dict[str, dict]:
+        """
+        Render the stages for the run summary JSON.
+        """
+        with self._lock:
+            stages = list(self.stages.values())
+        return {
+            metrics.stage: {
+                **{key: value for key, value in asdict(metrics).items() if key != "stage"},
+                "wall_seconds": round(metrics.wall_seconds, 4),
+                "cpu_seconds": round(metrics.cpu_seconds, 4),
+                "rows_per_sec": (round(metrics.rows_per_sec, 1)
+                                 if metrics.rows_per_sec is not None else None),
+            }
+            for metrics in stages
+        }
+
+    def save(self, cursor, run_id: str, run_started_at) -> None:
+        """
+        Write one pipeline_run_metrics row per stage.
+        """
+        with self._lock:
+            stages = list(self.stages.values())
+        cursor.executemany("""
+            INSERT INTO pipeline_run_metrics (
+                run_id, run_started_at, stage, calls, wall_seconds, cpu_seconds,
+                rows_in, rows_out, rows_per_sec, peak_rss_kb
+            )
+            VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+        """, [
+            (run_id, run_started_at, m.stage, m.calls, m.wall_seconds, m.cpu_seconds,
+             m.rows_in, m.rows_out, m.rows_per_sec, m.peak_rss_kb)
+            for m in stages
+        ])
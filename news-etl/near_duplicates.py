@@ -0,0 +1,316 @@
+"""
+Near-duplicate detection for syndicated stories.
+
+Wire stories are republished by many sources under different article ids,
+often lightly edited or cut short, so exact id and content-hash checks miss
+them. Every article gets a MinHash signature over word shingles of its
+title and body, and articles whose estimated Jaccard similarity reaches
+NEAR_DUP_THRESHOLD share a ``cluster_id``: the id of the first article of
+the story that was seen.
+
+Candidates are found with locality-sensitive hashing rather than pairwise
+comparison. A signature is cut into BANDS bands, each hashed to a bucket,
+and only articles sharing at least one bucket are compared. The buckets
+live in ``article_lsh_buckets`` and the signatures in ``article_signatures``,
+so a probe costs BANDS index lookups per article however many articles are
+stored. The index covers articles ingested in the last NEAR_DUP_WINDOW_DAYS
+days; older entries are pruned when the schema is initialized.
+
+Signatures use one-permutation hashing: each shingle is hashed once, the
+hash picks one of NUM_HASHES bins and every bin keeps its minimum. Empty
+bins, common for short texts, take the value of the next non-empty bin
+(rotation densification). This costs one hash per shingle instead of one
+per shingle per hash function.
+"""
+
+import os
+import re
+import struct
+import zlib
+from dataclasses import dataclass
+from hashlib import blake2b
+
+
+# Set to "false" to skip near-duplicate detection; cluster_id is then left NULL
+NEAR_DUP_ENABLED: bool = os.environ.get("NEAR_DUP", "true").lower() == "true"
+
+# Minimum estimated Jaccard similarity of the shingle sets of two copies
+NEAR_DUP_THRESHOLD: float = float(os.environ.get("NEAR_DUP_THRESHOLD", "0.6"))
+
+# Days of ingested articles kept in the LSH index
+NEAR_DUP_WINDOW_DAYS: int = int(os.environ.get("NEAR_DUP_WINDOW_DAYS", "7"))
+
+# Words per shingle
+SHINGLE_WORDS: int = 3
+
+# Signature length, a power of two
+NUM_HASHES: int = 128
+
+# BANDS bands of NUM_HASHES // BANDS values. Two articles with similarity s
+# share a bucket with probability 1 - (1 - s**4)**32: 0.988 at the default
+# threshold of 0.6, 0.9998 at s = 0.7 and 0.016 at s = 0.15
+BANDS: int = 32
+ROWS: int = NUM_HASHES // BANDS
+
+_BIN_SHIFT = 64 - (NUM_HASHES.bit_length() - 1)
+_MASK64 = (1 << 64) - 1
+_MASK32 = (1 << 32) - 1
+# Fibonacci hashing multiplier; the high bits of the product are well mixed
+_MULTIPLIER = 0x9E3779B97F4A7C15
+# Added per step when an empty bin borrows from a later one, so borrowed values differ
+_ROTATION_OFFSET = 0x9E3779B1
+
+_WORD = re.compile(r"\w+")
+
+
+def _shingle_hashes(text: str) -> set[int]:
+    """
+    Hash the overlapping SHINGLE_WORDS-word shingles of `text` to 64 bits.
+
+    Texts shorter than one shingle hash as a single shingle of all their
+    words. Hashes are stable across processes, unlike hash().
+    """
+    words = [zlib.crc32(word.encode("utf-8")) for word in _WORD.findall(text.lower())]
+    if not words:
+        return set()
+    if len(words) < SHINGLE_WORDS:
+        words += [0] * (SHINGLE_WORDS - len(words))
+    return {
+        ((a ^ (b << 21) ^ (c << 42)) * _MULTIPLIER) & _MASK64
+        for a, b, c in zip(words, words[1:], words[2:])
+    }
+
+
+def minhash_signature(title: str | None, body: str | None) -> list[int] | None:
+    """
+    MinHash signature of an article's title and body, or None if it has no words.
+
+    The top bits of a shingle hash pick its bin and 32 of the next bits are
+    the stored value.
+    """
+    hashes = _shingle_hashes(f"{title or ''} {body or ''}")
+    if not hashes:
+        return None
+
+    # Assigned in descending order, so each bin ends up with its minimum
+    minimums = {value >> _BIN_SHIFT: value for value in sorted(hashes, reverse=True)}
+    signature = [None] * NUM_HASHES
+    for position, value in minimums.items():
+        signature[position] = (value >> (_BIN_SHIFT - 32)) & _MASK32
+
+    for position in range(NUM_HASHES):
+        if signature[position] is None:
+            step = 1
+            while signature[(position + step) % NUM_HASHES] is None:
+                step += 1
+            borrowed = signature[(position + step) % NUM_HASHES]
+            signature[position] = (borrowed + step * _ROTATION_OFFSET) & _MASK32
+    return signature
+
+
+def band_buckets(signature: list[int]) -> list[int]:
+    """
+    Hash each band of a signature to a signed 64-bit bucket (a BIGINT).
+
+    The band number is part of the hash, so buckets of different bands
+    never collide and can share one index.
+    """
+    buckets = []
+    for band in range(BANDS):
+        values = signature[band * ROWS:(band + 1) * ROWS]
+        digest = blake2b(struct.pack(f"<H{ROWS}I", band, *values), digest_size=8).digest()
+        buckets.append(int.from_bytes(digest, "little", signed=True))
+    return buckets
+
+
+def estimate_similarity(a: list[int], b: list[int]) -> float:
+    """
+    Estimated Jaccard similarity: the share of signature positions that agree.
+    """
+    return sum(x == y for x, y in zip(a, b)) / NUM_HASHES
+
+
+def _pack(signature: list[int]) -> bytes:
+    return struct.pack(f"<{NUM_HASHES}I", *signature)
+
+
+def _unpack(data) -> list[int]:
+    return list(struct.unpack(f"<{NUM_HASHES}I", bytes(data)))
+
+
+def initialize_near_duplicate_index(cursor) -> None:
+    """
+    Create the LSH index tables.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_signatures (
+            article_id TEXT PRIMARY KEY,
+            cluster_id TEXT NOT NULL,
+            signature BYTEA NOT NULL,
+            indexed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_article_signatures_indexed_at
+        ON article_signatures (indexed_at)
+    """)
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS article_lsh_buckets (
+            bucket BIGINT NOT NULL,
+            article_id TEXT NOT NULL,
+            indexed_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (bucket, article_id)
+        )
+    """)
+    # BANDS rows per article, appended in indexed_at order: BRIN keeps the
+    # pruning index tiny and cheap to maintain
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_article_lsh_buckets_indexed_at
+        ON article_lsh_buckets USING BRIN (indexed_at)
+    """)
+
+
+def prune_near_duplicate_index(cursor, window_days: int = NEAR_DUP_WINDOW_DAYS) -> int:
+    """
+    Remove index entries older than the window.
+
+    Returns the number of signatures removed.
+    """
+    cursor.execute("""
+        DELETE FROM article_lsh_buckets
+        WHERE indexed_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+    """, (window_days,))
+    cursor.execute("""
+        DELETE FROM article_signatures
+        WHERE indexed_at < CURRENT_TIMESTAMP - make_interval(days => %s)
+    """, (window_days,))
+    return cursor.rowcount
+
+
+@dataclass
+class _Entry:
+    article_id: str
+    cluster_id: str
+    signature: list[int]
+
+
+class NearDuplicateIndex:
+    """
+    Assigns cluster_id to batches of articles against the LSH index.
+
+    Articles already in the index keep their cluster without being hashed
+    again, which covers the re-fetched articles of incremental runs. The
+    rest are probed with one query and written back with two bulk inserts,
+    in the caller's transaction, so the index commits together with the
+    articles it describes. Near-duplicate counts accumulate across batches
+    for the run summary.
+    """
+
+    def __init__(self, cursor, threshold: float = NEAR_DUP_THRESHOLD,
+                 window_days: int = NEAR_DUP_WINDOW_DAYS):
+        self.cursor = cursor
+        self.threshold = threshold
+        self.window_days = window_days
+        self.near_duplicates = 0
+
+    def _fetch_clusters(self, ids: list[str]) -> dict[str, str]:
+        self.cursor.execute("""
+            SELECT article_id, cluster_id
+            FROM article_signatures
+            WHERE article_id = ANY(%s)
+              AND indexed_at >= CURRENT_TIMESTAMP - make_interval(days => %s)
+        """, (ids, self.window_days))
+        return dict(self.cursor.fetchall())
+
+    def _fetch_candidates(self, buckets: list[list[int]]) -> list[list[_Entry]]:
+        """
+        Return the indexed articles sharing a bucket with each article.
+        """
+        positions = [position for position, article_buckets in enumerate(buckets)
+                     for _ in article_buckets]
+        values = [bucket for article_buckets in buckets for bucket in article_buckets]
+
+        self.cursor.execute("""
+            WITH matches AS (
+                SELECT DISTINCT probe.position, buckets.article_id
+                FROM unnest(%s::int[], %s::bigint[]) AS probe(position, bucket)
+                JOIN article_lsh_buckets AS buckets ON buckets.bucket = probe.bucket
+            )
+            SELECT matches.position, sig.article_id, sig.cluster_id, sig.signature
+            FROM matches
+            JOIN article_signatures AS sig ON sig.article_id = matches.article_id
+            WHERE sig.indexed_at >= CURRENT_TIMESTAMP - make_interval(days => %s)
+        """, (positions, values, self.window_days))
+
+        candidates: list[list[_Entry]] = [[] for _ in buckets]
+        for position, article_id, cluster_id, signature in self.cursor.fetchall():
+            candidates[position].append(_Entry(article_id, cluster_id, _unpack(signature)))
+        return candidates
+
+    def _store(self, entries: list[tuple[_Entry, list[int]]]) -> None:
+        self.cursor.execute("""
+            INSERT INTO article_signatures (article_id, cluster_id, signature)
+            SELECT * FROM unnest(%s::text[], %s::text[], %s::bytea[])
+            ON CONFLICT (article_id) DO NOTHING
+        """, ([entry.article_id for entry, _ in entries],
+              [entry.cluster_id for entry, _ in entries],
+              [_pack(entry.signature) for entry, _ in entries]))
+        self.cursor.execute("""
+            INSERT INTO article_lsh_buckets (bucket, article_id)
+            SELECT * FROM unnest(%s::bigint[], %s::text[])
+            ON CONFLICT (bucket, article_id) DO NOTHING
+        """, ([bucket for _, buckets in entries for bucket in buckets],
+              [entry.article_id for entry, _ in entries for _ in range(BANDS)]))
+
+    def assign_clusters(self, articles: list[dict]) -> None:
+        """
+        Set ``cluster_id`` on each article and index the new ones.
+
+        A new article joins the cluster of its most similar indexed or
+        earlier in-batch article at or above the threshold, and otherwise
+        starts its own cluster. Articles without any words are left
+        unclustered.
+        """
+        clusters = self._fetch_clusters(list({article["id"] for article in articles}))
+
+        signed = []
+        for article in articles:
+            if article["id"] in clusters:
+                article["cluster_id"] = clusters[article["id"]]
+                continue
+            signature = minhash_signature(article.get("title"), article.get("body"))
+            if signature is None:
+                article["cluster_id"] = None
+            else:
+                signed.append((article, signature, band_buckets(signature)))
+        if not signed:
+            return
+
+        candidates = self._fetch_candidates([buckets for _, _, buckets in signed])
+
+        # Buckets of articles indexed earlier in this batch
+        batch_buckets: dict[int, list[_Entry]] = {}
+        new_entries = []
+        for (article, signature, buckets), indexed in zip(signed, candidates):
+            # A repeated id in the batch keeps the cluster of its first copy
+            if article["id"] in clusters:
+                article["cluster_id"] = clusters[article["id"]]
+                continue
+
+            matches = indexed + [match for bucket in buckets for match in batch_buckets.get(bucket, ())]
+            best, best_similarity = None, self.threshold
+            for match in matches:
+                similarity = estimate_similarity(signature, match.signature)
+                if similarity >= best_similarity:
+                    best, best_similarity = match, similarity
+
+            if best is not None:
+                self.near_duplicates += 1
+            entry = _Entry(article["id"], best.cluster_id if best else article["id"], signature)
+            article["cluster_id"] = clusters[article["id"]] = entry.cluster_id
+            new_entries.append((entry, buckets))
+            for bucket in buckets:
+                batch_buckets.setdefault(bucket, []).append(entry)
+
+        if new_entries:
+            self._store(new_entries)
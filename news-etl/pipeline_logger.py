@@ -0,0 +1,216 @@
+"""
+Buffered writer for the pipeline_logs table.
+
+Log entries are kept in memory and written with one multi-row INSERT when
+the buffer reaches LOG_FLUSH_SIZE entries or when the pipeline calls
+``flush()`` at a stage boundary (before every commit). Each entry keeps the
+time it was logged as its run_timestamp, and entries are inserted in the
+order they were logged, so ``ORDER BY id`` still matches logging order.
+
+Used as a context manager, the logger flushes and commits whatever is left
+on the way out, including when the run fails part-way through.
+
+Every entry carries the run_id of the run that wrote it. pipeline_logs is
+range-partitioned by run_timestamp into one partition per month, so old
+months are removed by dropping their partition instead of deleting rows.
+"""
+
+import json
+import os
+from datetime import date, datetime
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+
+# Buffered entries that force a flush regardless of stage boundaries
+LOG_FLUSH_SIZE: int = int(os.environ.get("PIPELINE_LOG_FLUSH_SIZE", "500"))
+
+# Monthly pipeline_logs partitions kept, including the current month
+LOG_RETENTION_MONTHS: int = int(os.environ.get("PIPELINE_LOG_RETENTION_MONTHS", "6"))
+
+_PARTITION_PREFIX = "pipeline_logs_p"
+
+
+class PipelineLogger:
+    """
+    Accumulates pipeline_logs rows and inserts them in batches.
+
+    Flushing only writes the rows; committing them is left to the caller so
+    logs land in the same transaction as the work they describe.
+
+    On leaving a ``with`` block the remaining entries are flushed and
+    committed. If the block raised, the open transaction is rolled back
+    first (it may be aborted) and an ERROR entry for the exception is added.
+    """
+
+    def __init__(self, cursor, run_id: str | None = None, flush_size: int = LOG_FLUSH_SIZE):
+        self.cursor = cursor
+        self.run_id = run_id
+        self.flush_size = flush_size
+        self._entries: list[tuple] = []
+
+    def log(self, level: str, message: str, record_id: str = None, details: dict = None) -> None:
+        """
+        Queue a message for the pipeline_logs table.
+
+        Levels: INFO, WARNING, ERROR
+        """
+        self._entries.append((
+            self.run_id,
+            datetime.now(),
+            level,
+            message,
+            record_id,
+            json.dumps(details) if details else None
+        ))
+        if len(self._entries) >= self.flush_size:
+            self.flush()
+
+    def flush(self) -> None:
+        """
+        Insert every buffered entry with a single statement.
+
+        Entries stay buffered if the insert fails, so they can be written
+        again after a rollback.
+        """
+        if not self._entries:
+            return
+
+        execute_values(self.cursor, """
+            INSERT INTO pipeline_logs (run_id, run_timestamp, log_level, message, record_id, details)
+            VALUES %s
+        """, self._entries, page_size=len(self._entries))
+        self._entries.clear()
+
+    def __enter__(self) -> "PipelineLogger":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        conn = self.cursor.connection
+        try:
+            if exc is not None:
+                conn.rollback()
+                self.log("ERROR", f"Pipeline run failed: {exc}",
+                         details={"exception_type": exc_type.__name__})
+            self.flush()
+            conn.commit()
+        except psycopg2.Error as e:
+            print(f"Could not write pipeline logs: {e}")
+        # Never swallow the original exception
+        return False
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def month_start(day: date) -> date:
+    return date(day.year, day.month, 1)
+
+
+def create_log_partition(cursor, month: date) -> None:
+    """
+    Create the pipeline_logs partition holding `month`, if it is missing.
+    """
+    month = month_start(month)
+    cursor.execute(f"""
+        CREATE TABLE IF NOT EXISTS {_PARTITION_PREFIX}{month:%Y%m}
+        PARTITION OF pipeline_logs
+        FOR VALUES FROM ('{month.isoformat()}') TO ('{add_months(month, 1).isoformat()}')
+    """)
+
+
+def initialize_log_table(cursor, today: date | None = None) -> None:
+    """
+    Create the partitioned pipeline_logs table and its upcoming partitions.
+
+    A pipeline_logs table from before partitioning is renamed out of the
+    way, its rows are copied into the new table (keeping their ids) and it
+    is dropped. Partitions for this month and next month are created on
+    every run, so inserts never find a missing partition.
+    """
+    today = today or date.today()
+
+    cursor.execute("SELECT relkind FROM pg_class WHERE oid = to_regclass('pipeline_logs')")
+    row = cursor.fetchone()
+    unpartitioned = row is not None and row[0] == "r"
+    if unpartitioned:
+        cursor.execute("ALTER TABLE pipeline_logs RENAME TO pipeline_logs_unpartitioned")
+        cursor.execute("ALTER INDEX IF EXISTS pipeline_logs_pkey RENAME TO pipeline_logs_unpartitioned_pkey")
+        cursor.execute("ALTER SEQUENCE IF EXISTS pipeline_logs_id_seq RENAME TO pipeline_logs_unpartitioned_id_seq")
+
+    # The partition key has to be part of the primary key
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS pipeline_logs (
+            id SERIAL,
+            run_id TEXT,
+            run_timestamp TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            log_level TEXT NOT NULL,
+            message TEXT NOT NULL,
+            record_id TEXT,
+            details JSONB,
+            PRIMARY KEY (id, run_timestamp)
+        ) PARTITION BY RANGE (run_timestamp)
+    """)
+
+    months = {month_start(today), add_months(month_start(today), 1)}
+    if unpartitioned:
+        cursor.execute("""
+            SELECT DISTINCT date_trunc('month', COALESCE(run_timestamp, CURRENT_TIMESTAMP))::DATE
+            FROM pipeline_logs_unpartitioned
+        """)
+        months.update(month for month, in cursor.fetchall())
+    for month in sorted(months):
+        create_log_partition(cursor, month)
+
+    if unpartitioned:
+        cursor.execute("""
+            INSERT INTO pipeline_logs (id, run_timestamp, log_level, message, record_id, details)
+            SELECT id, COALESCE(run_timestamp, CURRENT_TIMESTAMP), log_level, message, record_id, details
+            FROM pipeline_logs_unpartitioned
+            ORDER BY id
+        """)
+        cursor.execute("""
+            SELECT setval(pg_get_serial_sequence('pipeline_logs', 'id'),
+                          COALESCE((SELECT MAX(id) FROM pipeline_logs), 0) + 1, false)
+        """)
+        cursor.execute("DROP TABLE pipeline_logs_unpartitioned")
+
+    # Created on the parent, so every partition gets them
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_pipeline_logs_run_id ON pipeline_logs (run_id)")
+    cursor.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pipeline_logs_level_time
+        ON pipeline_logs (log_level, run_timestamp)
+    """)
+
+
+def drop_expired_log_partitions(cursor, retention_months: int = LOG_RETENTION_MONTHS,
+                                today: date | None = None) -> list[str]:
+    """
+    Drop pipeline_logs partitions older than the retention window.
+
+    Dropping a partition is a catalog operation, so it costs the same
+    however many rows the month holds. Returns the dropped partition names.
+    """
+    if retention_months <= 0:
+        return []
+
+    cutoff = add_months(month_start(today or date.today()), 1 - retention_months)
+    cursor.execute("""
+        SELECT child.relname
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = 'pipeline_logs'::regclass
+    """)
+
+    dropped = []
+    for name, in cursor.fetchall():
+        suffix = name[len(_PARTITION_PREFIX):]
+        if not name.startswith(_PARTITION_PREFIX) or not suffix.isdigit() or len(suffix) != 6:
+            continue
+        if date(int(suffix[:4]), int(suffix[4:]), 1) < cutoff:
+            cursor.execute(f"DROP TABLE {name}")
+            dropped.append(name)
+    return sorted(dropped)
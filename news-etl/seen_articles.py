@@ -0,0 +1,213 @@
+"""
+Early skipping of articles that are already stored unchanged.
+
+Incremental runs re-fetch the last day, so much of every batch is already
+in the database. Each raw API article gets a ``source_hash``: a fingerprint
+of the fields the transform reads plus the sentiment engine version, stored
+with the article. Before the transform, a batch's fingerprints are tested
+against a Bloom filter of every stored fingerprint. Positives are confirmed
+with one query against ``articles``, and confirmed articles skip sentiment
+scoring, validation, clustering and the upsert.
+
+A Bloom filter has no false negatives, so an article is only processed
+again when it is new or changed, when it was not loaded in a run that
+stopped before saving the filter, or when the filter was just rebuilt.
+False positives cost one indexed lookup each and are never skipped.
+
+The filter is sized for SEEN_FILTER_CAPACITY fingerprints at
+SEEN_FILTER_FP_RATE and kept in ``seen_article_filter``, one row of about
+1.2 MB at the defaults. It is loaded when the first batch is checked,
+extended in memory as batches commit and saved at the end of a run that
+added to it, so a run that loads nothing new writes nothing. Once it holds
+more than its capacity, or the sizing changes, it is rebuilt from the
+newest half of the capacity of stored articles.
+"""
+
+import hashlib
+import json
+import math
+import os
+
+from sentiment_engines import get_engine_version
+
+
+# Set to "false" to process every fetched article
+SEEN_FILTER_ENABLED: bool = os.environ.get("SEEN_FILTER", "true").lower() == "true"
+
+# Fingerprints the filter holds before it is rebuilt
+SEEN_FILTER_CAPACITY: int = int(os.environ.get("SEEN_FILTER_CAPACITY", "1000000"))
+
+# False-positive rate at capacity
+SEEN_FILTER_FP_RATE: float = float(os.environ.get("SEEN_FILTER_FP_RATE", "0.01"))
+
+# Raw API fields the transform reads
+_SOURCE_FIELDS = ("article_id", "title", "creator", "content", "source_name", "pubDate")
+
+
+def source_hash(item: dict, engine_version: str | None = None) -> str:
+    """
+    Fingerprint a raw API article together with the sentiment engine
+    version, so switching engines processes every article once more.
+    """
+    payload = json.dumps([item.get(field) for field in _SOURCE_FIELDS]
+                         + [engine_version or get_engine_version()],
+                         ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BloomFilter:
+    """
+    Bit-array Bloom filter over hex digests.
+
+    Bit positions come from two 64-bit slices of the digest (double
+    hashing), so keys are not hashed again.
+    """
+
+    def __init__(self, num_bits: int, num_hashes: int, bits: bytes | None = None, items: int = 0):
+        self.num_bits = num_bits
+        self.num_hashes = num_hashes
+        self.bits = bytearray(bits) if bits is not None else bytearray((num_bits + 7) // 8)
+        self.items = items
+
+    @classmethod
+    def for_capacity(cls, capacity: int, fp_rate: float) -> "BloomFilter":
+        num_bits = max(8, math.ceil(-capacity * math.log(fp_rate) / math.log(2) ** 2))
+        num_hashes = max(1, round(num_bits / capacity * math.log(2)))
+        return cls(num_bits, num_hashes)
+
+    def _positions(self, key: str) -> list[int]:
+        first, second = int(key[:16], 16), int(key[16:32], 16) | 1
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, key: str) -> None:
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.items += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self.bits[position >> 3] & (1 << (position & 7))
+                   for position in self._positions(key))
+
+
+def initialize_seen_filter(cursor) -> None:
+    """
+    Create the table holding the persisted filter.
+    """
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS seen_article_filter (
+            id SMALLINT PRIMARY KEY DEFAULT 1 CHECK (id = 1),
+            num_bits BIGINT NOT NULL,
+            num_hashes INTEGER NOT NULL,
+            items BIGINT NOT NULL,
+            bits BYTEA NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    cursor.execute("ALTER TABLE seen_article_filter ALTER COLUMN bits SET STORAGE EXTERNAL")
+
+
+class SeenArticleFilter:
+    """
+    Drops raw articles whose stored version is identical.
+
+    Skip and lookup counts accumulate across batches for the run summary.
+    """
+
+    def __init__(self, cursor, capacity: int = SEEN_FILTER_CAPACITY,
+                 fp_rate: float = SEEN_FILTER_FP_RATE):
+        self.cursor = cursor
+        self.capacity = capacity
+        self.fp_rate = fp_rate
+        self.engine_version = get_engine_version()
+        self.checked = 0
+        self.skipped = 0
+        self.false_positives = 0
+        self.rebuilt = False
+        # Holds fingerprints the saved filter lacks
+        self.dirty = False
+        self._bloom: BloomFilter | None = None
+
+    @property
+    def bloom(self) -> BloomFilter:
+        # Loaded, or rebuilt, only once a batch has to be checked
+        if self._bloom is None:
+            self._bloom = self._load(BloomFilter.for_capacity(self.capacity, self.fp_rate))
+        return self._bloom
+
+    @property
+    def skip_rate(self) -> float | None:
+        return round(self.skipped / self.checked, 4) if self.checked else None
+
+    def _load(self, empty: BloomFilter) -> BloomFilter:
+        self.cursor.execute("SELECT num_bits, num_hashes, items, bits FROM seen_article_filter")
+        row = self.cursor.fetchone()
+        if row and row[:2] == (empty.num_bits, empty.num_hashes) and row[2] <= self.capacity:
+            return BloomFilter(row[0], row[1], bytes(row[3]), row[2])
+
+        # Missing, resized or full: refill from the newest stored articles
+        self.rebuilt = True
+        self.dirty = True
+        self.cursor.execute("""
+            SELECT source_hash FROM articles
+            WHERE source_hash IS NOT NULL
+            ORDER BY published_ts DESC
+            LIMIT %s
+        """, (self.capacity // 2,))
+        for key, in self.cursor:
+            empty.add(key)
+        return empty
+
+    def filter(self, items: list[dict]) -> list[dict]:
+        """
+        Return the raw articles that are new or changed, in input order.
+
+        Each returned article carries its fingerprint under ``source_hash``.
+        """
+        for item in items:
+            item["source_hash"] = source_hash(item, self.engine_version)
+        self.checked += len(items)
+
+        maybe_seen = [item for item in items
+                      if item.get("article_id") and item["source_hash"] in self.bloom]
+        stored: set[tuple[str, str]] = set()
+        if maybe_seen:
+            self.cursor.execute("""
+                SELECT id, source_hash FROM articles
+                WHERE id = ANY(%s) AND source_hash IS NOT NULL
+            """, ([item["article_id"] for item in maybe_seen],))
+            stored = set(self.cursor.fetchall())
+
+        fresh = [item for item in items if (item.get("article_id"), item["source_hash"]) not in stored]
+        self.false_positives += len(maybe_seen) - (len(items) - len(fresh))
+        self.skipped += len(items) - len(fresh)
+        return fresh
+
+    def add(self, articles: list[dict]) -> None:
+        """
+        Record the fingerprints of articles that were just loaded.
+        """
+        for article in articles:
+            if article.get("source_hash"):
+                self.bloom.add(article["source_hash"])
+                self.dirty = True
+
+    def save(self) -> None:
+        """
+        Persist the filter; run in the transaction that ends the run.
+
+        Does nothing when no fingerprint was added, which leaves the large
+        stored value, and its TOAST chunks, untouched.
+        """
+        if not self.dirty:
+            return
+        self.cursor.execute("""
+            INSERT INTO seen_article_filter (id, num_bits, num_hashes, items, bits)
+            VALUES (1, %s, %s, %s, %s)
+            ON CONFLICT (id) DO UPDATE SET
+                num_bits = EXCLUDED.num_bits,
+                num_hashes = EXCLUDED.num_hashes,
+                items = EXCLUDED.items,
+                bits = EXCLUDED.bits,
+                updated_at = CURRENT_TIMESTAMP
+        """, (self.bloom.num_bits, self.bloom.num_hashes, self.bloom.items, bytes(self.bloom.bits)))
+        self.dirty = False
@@ -0,0 +1,208 @@
+"""
+Sentiment scoring for the news ETL pipeline.
+
+Scores come from the engine selected by SENTIMENT_ENGINE (see
+sentiment_engines.py). Scoring is CPU-bound, so scoring a large batch
+serially pegs one core while the rest of the container idles.
+``score_texts`` can spread a batch across a process pool instead, returning
+results in input order and identical to the serial path.
+
+Incremental runs re-pull the last day, so most titles have been scored
+before. ``SentimentCache`` memoizes scores in the ``sentiment_cache`` table,
+keyed by a hash of the normalized text and the engine version.
+"""
+
+import atexit
+import hashlib
+import os
+
+from sentiment_engines import get_engine, get_engine_version
+
+
+# Worker processes for sentiment scoring (1 = score serially in-process)
+SENTIMENT_WORKERS: int = int(os.environ.get("SENTIMENT_WORKERS", "1"))
+
+# Texts sent to a worker per task, to amortize pickling and IPC
+SENTIMENT_CHUNK_SIZE: int = int(os.environ.get("SENTIMENT_CHUNK_SIZE", "64"))
+
+# Set to "false" to bypass the sentiment cache
+SENTIMENT_CACHE_ENABLED: bool = os.environ.get("SENTIMENT_CACHE", "true").lower() == "true"
+
+_pool = None
+_pool_workers: int = 0
+
+
+def calculate_sentiment(text: str | None) -> float | None:
+    """
+    Calculate sentiment polarity score for given text.
+
+    Returns a float between -1.0 (very negative) and 1.0 (very positive),
+    or None if text is empty/None.
+    """
+    if not text or not text.strip():
+        return None
+
+    try:
+        return round(get_engine().polarity(text), 4)
+    except Exception as e:
+        print(f"Sentiment analysis failed: {e}")
+        return None
+
+
+def calculate_sentiments(texts: list[str | None]) -> list[float | None]:
+    """
+    Score a batch of texts with one call to the engine's polarity_batch.
+
+    Empty texts score None, like calculate_sentiment. If the batch call
+    fails, its texts are scored one at a time, so only the texts that
+    cannot be scored lose their score.
+    """
+    positions = [position for position, text in enumerate(texts) if text and text.strip()]
+    results: list[float | None] = [None] * len(texts)
+    if not positions:
+        return results
+
+    try:
+        scores = get_engine().polarity_batch([texts[position] for position in positions])
+    except Exception:
+        return [calculate_sentiment(text) for text in texts]
+
+    for position, score in zip(positions, scores):
+        results[position] = round(score, 4)
+    return results
+
+
+def _get_pool(workers: int):
+    """
+    Return the shared process pool, starting it on first use.
+
+    The pool lives for the whole run so worker start-up is paid once, not
+    once per page. multiprocessing is only imported once a pool is needed.
+
+    Workers come from a fork server rather than fork(): the pool starts
+    while the extract threads are running, and forking a multi-threaded
+    process can deadlock the child.
+    """
+    global _pool, _pool_workers
+
+    from concurrent.futures import ProcessPoolExecutor
+    from multiprocessing import get_context
+
+    if _pool is None or _pool_workers != workers:
+        shutdown_pool()
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=get_context("forkserver"))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_pool() -> None:
+    """
+    Stop the shared process pool, if one was started.
+    """
+    global _pool, _pool_workers
+
+    if _pool is not None:
+        _pool.shutdown(wait=True)
+        _pool = None
+        _pool_workers = 0
+
+
+atexit.register(shutdown_pool)
+
+
+def score_texts(texts: list[str | None], workers: int = SENTIMENT_WORKERS,
+                chunk_size: int = SENTIMENT_CHUNK_SIZE) -> list[float | None]:
+    """
+    Score a batch of texts, in parallel when more than one worker is configured.
+
+    Results are returned in input order. Every chunk is scored with one
+    polarity_batch call. Batches no larger than one chunk are scored
+    in-process, since shipping them to a worker costs more than it saves.
+    """
+    if workers <= 1 or len(texts) <= chunk_size:
+        return calculate_sentiments(texts)
+
+    pool = _get_pool(workers)
+    chunks = [texts[start:start + chunk_size] for start in range(0, len(texts), chunk_size)]
+    return [score for scores in pool.map(calculate_sentiments, chunks) for score in scores]
+
+
+def text_hash(text: str) -> str:
+    """
+    Hash text for cache lookups, ignoring differences in whitespace.
+    """
+    normalized = " ".join(text.split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+
+
+class SentimentCache:
+    """
+    Database-backed memo of sentiment scores.
+
+    Entries are keyed by text hash and analyzer version, which defaults to
+    the active engine's version so switching or upgrading engines never
+    serves stale scores.
+
+    Each batch is resolved with one bulk lookup, only the misses are scored,
+    and the new scores are written back with one bulk insert. Hit and miss
+    counts accumulate across batches for the run summary.
+    """
+
+    def __init__(self, cursor, analyzer_version: str | None = None):
+        self.cursor = cursor
+        self.analyzer_version = analyzer_version or get_engine_version()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def hit_rate(self) -> float | None:
+        lookups = self.hits + self.misses
+        return round(self.hits / lookups, 4) if lookups else None
+
+    def _fetch(self, hashes: list[str]) -> dict[str, float]:
+        self.cursor.execute("""
+            SELECT text_hash, sentiment_score
+            FROM sentiment_cache
+            WHERE analyzer_version = %s AND text_hash = ANY(%s)
+        """, (self.analyzer_version, hashes))
+        return dict(self.cursor.fetchall())
+
+    def _store(self, scores: dict[str, float]) -> None:
+        self.cursor.execute("""
+            INSERT INTO sentiment_cache (text_hash, analyzer_version, sentiment_score)
+            SELECT text_hash, %s, sentiment_score
+            FROM unnest(%s::text[], %s::double precision[]) AS s(text_hash, sentiment_score)
+            ON CONFLICT (text_hash, analyzer_version) DO NOTHING
+        """, (self.analyzer_version, list(scores), list(scores.values())))
+
+    def score(self, texts: list[str | None]) -> list[float | None]:
+        """
+        Score a batch of texts, reusing cached scores where available.
+
+        Results are returned in input order.
+        """
+        keys = [text_hash(text) if text and text.strip() else None for text in texts]
+        unique_keys = list({key for key in keys if key})
+        if not unique_keys:
+            return [None] * len(texts)
+
+        cached = self._fetch(unique_keys)
+
+        # Score each distinct uncached text once
+        pending: dict[str, str] = {}
+        for key, text in zip(keys, texts):
+            if key and key not in cached and key not in pending:
+                pending[key] = text
+
+        self.hits += sum(1 for key in keys if key and key in cached)
+        self.misses += sum(1 for key in keys if key and key not in cached)
+
+        if pending:
+            fresh = dict(zip(pending, score_texts(list(pending.values()))))
+            # Failed scores come back as None and are retried next run
+            fresh = {key: score for key, score in fresh.items() if score is not None}
+            if fresh:
+                self._store(fresh)
+            cached.update(fresh)
+
+        return [cached.get(key) if key else None for key in keys]
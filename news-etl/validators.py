@@ -5,6 +5,7 @@ This module implements the "fail fast" principle: catch data quality issues
 early in the pipeline before bad data reaches the database.
 """
 
+from collections import Counter
 from dataclasses import dataclass
 from typing import Any
 
@@ -86,27 +87,51 @@ def validate_batch(articles: list[dict[str, Any]]) -> tuple[list[dict], list[Val
 
     This implementation uses a lenient approach, which is common when
     dealing with external APIs where you can't control data quality.
+
+    Each rule is evaluated column by column over the whole batch first.
+    Only rows flagged by at least one rule go through validate_article, so
+    the common clean article never allocates a ValidationResult. The
+    outcome, including the warnings printed for valid articles, is the
+    same as validating every article in turn.
     """
 
-    valid_articles = []
-    invalid_results = []
+    ids = [article.get("id") for article in articles]
+    has_title = [bool(article.get("title")) for article in articles]
+    has_body = [bool(article.get("body")) for article in articles]
+    # Plain numbers in range; anything else (bool, NaN, strings...) is left to validate_article
+    score_ok = [
+        (score := article.get("sentiment_score")) is None
+        or (type(score) is float or type(score) is int) and -1.0 <= score <= 1.0
+        for article in articles
+    ]
 
     # Check for duplicate IDs within the batch
-    ids_seen = set()
     duplicates = set()
+    if len(set(ids)) != len(ids):
+        duplicates = {article_id for article_id, count in Counter(ids).items() if count > 1}
+
+    flagged = [
+        position
+        for position, (article_id, title_ok, body_ok, score_valid)
+        in enumerate(zip(ids, has_title, has_body, score_ok))
+        if not (article_id and title_ok and body_ok and score_valid) or article_id in duplicates
+    ]
 
-    for article in articles:
-        article_id = article.get("id")
-        if article_id in ids_seen:
-            duplicates.add(article_id)
-        ids_seen.add(article_id)
+    valid_articles = []
+    invalid_results = []
+    clean_from = 0
 
-    for article in articles:
+    for position in flagged:
+        # Unflagged rows pass every rule without warnings
+        valid_articles.extend(articles[clean_from:position])
+        clean_from = position + 1
+
+        article = articles[position]
         result = validate_article(article)
 
         # Add duplicate warning if applicable
-        if article.get("id") in duplicates:
-            result.warnings.append(f"Duplicate ID in batch: {article.get('id')}")
+        if ids[position] in duplicates:
+            result.warnings.append(f"Duplicate ID in batch: {ids[position]}")
 
         if result.is_valid:
             valid_articles.append(article)
@@ -116,4 +141,6 @@ def validate_batch(articles: list[dict[str, Any]]) -> tuple[list[dict], list[Val
         else:
             invalid_results.append(result)
 
-    return valid_articles, invalid_results
\ No newline at end of file
+    valid_articles.extend(articles[clean_from:])
+
+    return valid_articles, invalid_results